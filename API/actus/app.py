@@ -1,11 +1,19 @@
+import asyncio
 from fastapi import FastAPI
 from routes import transcription_router
+from models import load_model
 
 app = FastAPI()
 
 # Include the router from routes.py
 app.include_router(transcription_router)
 
+
+@app.on_event("startup")
+async def start_model_load():
+    # Load and warm up the model in the background so the port binds immediately
+    asyncio.get_running_loop().run_in_executor(None, load_model)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=3000)
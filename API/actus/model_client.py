@@ -0,0 +1,52 @@
+import os
+import json
+import socket
+import struct
+import itertools
+from types import SimpleNamespace
+
+# Blocking client for the shared model host (API/formedia/model_host.py); the
+# framing matches API/formedia/ipc.py.
+FRAME_HEADER = struct.Struct("!II")
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Model host closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+
+class RemoteWhisperModel:
+    """
+    Stand-in for WhisperModel that sends transcribe calls to the model host.
+    The host reads the audio file itself, so only its path crosses the socket;
+    the path is made absolute because the host runs from its own directory.
+    """
+
+    def __init__(self, socket_path, model_id, timeout=None):
+        self.socket_path = socket_path
+        self.model_id = model_id
+        self.timeout = timeout
+        self.ids = itertools.count()
+
+    def transcribe(self, audio_path, **params):
+        header = {"id": next(self.ids), "model": self.model_id, "method": "transcribe",
+                  "audio_path": os.path.abspath(audio_path), "params": params}
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(FRAME_HEADER.pack(len(header_bytes), 0) + header_bytes)
+            header_length, payload_length = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))
+            response = json.loads(_recv_exactly(sock, header_length))
+            _recv_exactly(sock, payload_length)
+
+        if not response.get("ok"):
+            raise RuntimeError(f"Model host error: {response.get('error')}")
+        result = response["result"]
+        segments = [SimpleNamespace(**segment) for segment in result["segments"]]
+        return segments, SimpleNamespace(**result["info"])
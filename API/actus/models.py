@@ -1,5 +1,66 @@
+import os
+import sys
+import time
+import logging
+import numpy as np
 from faster_whisper import WhisperModel
+from model_client import RemoteWhisperModel
 
-# Define the model size and load the model
+# Profiles are tuned and read by the formedia service's module; appended so local modules take precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "formedia"))
+from runtime_profile import load_profile
+
+logger = logging.getLogger(__name__)
+
+# Reference point for cold-start time; this module is imported while the app starts
+process_start_time = time.perf_counter()
+
+# Define the model size; the model itself is loaded by load_model() after the app starts
 model_size = "large-v2"
-model = WhisperModel(model_size, device="cuda", compute_type="float16")
+model = None
+ready = False
+load_error = None
+startup_timings = {}
+
+# Profile tuned for this host by runtime_profile.py, or that module's defaults for the detected device
+runtime_profile = load_profile(model_size)
+# When set, transcription runs on the shared model host instead of a model loaded here
+model_host_socket = os.environ.get("STT_MODEL_HOST_SOCKET")
+
+
+def load_model():
+    """Loads the model and runs a short warm-up decode. Blocking; run it off the event loop."""
+    global model, ready, load_error
+    try:
+        start_time = time.perf_counter()
+        if model_host_socket:
+            loaded = RemoteWhisperModel(model_host_socket, model_size)
+        else:
+            loaded = WhisperModel(model_size, device=runtime_profile["device"],
+                                  compute_type=runtime_profile["compute_type"],
+                                  cpu_threads=runtime_profile["cpu_threads"],
+                                  num_workers=runtime_profile["num_workers"])
+        startup_timings["load_seconds"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        if not model_host_socket:
+            # One second of faint noise pays the CUDA/CT2 initialisation before the first request
+            warmup_audio = np.random.default_rng(0).normal(0, 0.01, 16000).astype(np.float32)
+            segments, _ = loaded.transcribe(warmup_audio, beam_size=1, language="en")
+            list(segments)
+        startup_timings["warmup_seconds"] = time.perf_counter() - start_time
+        startup_timings["cold_start_seconds"] = time.perf_counter() - process_start_time
+
+        model = loaded
+        ready = True
+        logger.info(f"Model {model_size} ready: {startup_timings}")
+    except Exception as e:
+        load_error = str(e)
+        logger.error(f"Loading model {model_size} failed: {str(e)}")
+
+
+def record_request(seconds):
+    # The first request's latency shows whether the warm-up covered the cold path
+    if "first_request_seconds" not in startup_timings:
+        startup_timings["first_request_seconds"] = seconds
+        logger.info(f"First request served in {seconds:.2f}s")
@@ -1,17 +1,36 @@
 from fastapi import APIRouter, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
+import time
 import asyncio
 import concurrent.futures
+import models
 from utils import process_audio
 
 transcription_router = APIRouter()
 
 @transcription_router.post("/v1/audio/transcriptions")
 async def transcribe_audio(file: UploadFile = Form(...), language: str = Form(...)):
+    if not models.ready:
+        raise HTTPException(status_code=503, detail="Model is still loading")
+    start_time = time.perf_counter()
     # Create a thread pool to handle the processing asynchronously
     with concurrent.futures.ThreadPoolExecutor() as executor:
         result = await asyncio.get_event_loop().run_in_executor(
             executor,
             lambda: process_audio(file, language)
         )
+    models.record_request(time.perf_counter() - start_time)
     return result
+
+
+@transcription_router.get("/live")
+async def live_check():
+    return {"live": True}
+
+
+@transcription_router.get("/ready")
+async def ready_check():
+    # Unlike /live, only reports ready once the model is loaded and warmed up
+    if not models.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "error": models.load_error})
+    return {"ready": True, "model": models.model_size, **models.startup_timings}
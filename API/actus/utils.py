@@ -1,5 +1,5 @@
 import os
-from models import model
+import models
 from fastapi.responses import FileResponse
 from fastapi import UploadFile
 # Define the directory for audio uploads
@@ -27,7 +27,8 @@ def process_audio(audio_file: UploadFile, language: str):
             return {"error": "Unsupported language"}
 
         # Perform transcription
-        segments, info = model.transcribe(audio_file_path, beam_size=5, language=lang)
+        segments, info = models.model.transcribe(audio_file_path, beam_size=models.runtime_profile["beam_size"],
+                                                 language=lang)
 
         # Generate SRT file content
         srt_content = ""
@@ -1,22 +1,54 @@
+import os
 import requests
 import json
+import asyncio
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
 
 # Replace these values with actual test values
-API_URL = "http://192.168.18.164:8011/"
+API_URL = os.environ.get("SR_API_URL", "http://192.168.18.164:8011/")
+API_KEY = "apikey1"
+
+
+def parse_person(data):
+    """
+    Pulls the person's name out of a parsed Speaker_Recognition response.
+
+    Args:
+        data: Parsed JSON response, expected to be a non-empty list of dictionaries.
+    """
+    if isinstance(data, list) and len(data) > 0:
+        first_entry = data[0]  # Get the first dictionary in the list
+        if isinstance(first_entry, dict):
+            person_name = first_entry.get('person', 'Person not found')
+            return person_name
+        else:
+            print("First entry is not a dictionary.")
+    else:
+        print("Unexpected response structure: empty or not a list.")
+
 
-def speaker_recognition(file_path):
+def speaker_recognition(file_path=None, audio_bytes=None):
     """
     Sends a video file to the speaker recognition API and prints the person's name.
 
     Args:
         file_path (str): Path to the video file.
+        audio_bytes (bytes): In-memory WAV clip, sent instead of reading file_path.
     """
     try:
-        with open(file_path, 'rb') as video_file:
-            files = {'video_file': video_file}
-            headers = {'api_key': "apikey1"}
-            response = requests.post(f"{API_URL}/Speaker_Recognition/", 
+        headers = {'api_key': API_KEY}
+        if audio_bytes is not None:
+            files = {'video_file': ("chunk.wav", audio_bytes, "audio/wav")}
+            response = requests.post(f"{API_URL}/Speaker_Recognition/",
                                      files=files, headers=headers)
+        else:
+            with open(file_path, 'rb') as video_file:
+                files = {'video_file': video_file}
+                response = requests.post(f"{API_URL}/Speaker_Recognition/",
+                                         files=files, headers=headers)
 
         if response.status_code == 200:
             data = response.text  # Response is a string
@@ -30,20 +62,112 @@ def speaker_recognition(file_path):
                 return  # Exit if parsing fails
 
             # Now handle the parsed data (which should be a list)
-            if isinstance(data, list) and len(data) > 0:
-                first_entry = data[0]  # Get the first dictionary in the list
-                if isinstance(first_entry, dict):
-                    person_name = first_entry.get('person', 'Person not found')
-                    return person_name
-                else:
-                    print("First entry is not a dictionary.")
-            else:
-                print("Unexpected response structure: empty or not a list.")
+            return parse_person(data)
         else:
             print(f"Error {response.status_code}: {response.text}")
     except Exception as e:
         print("SR API is not working")
 
+
+class SpeakerRecognitionClient:
+    """
+    Async Speaker_Recognition client with a pooled keep-alive connection,
+    bounded parallelism, per-call timeouts and retries with exponential backoff.
+
+    With batch_size > 1, clips are sent batch_size at a time to the
+    /Speaker_Recognition_batch/ endpoint, which answers with one
+    Speaker_Recognition result per clip, in order.
+    """
+
+    def __init__(self, api_url=API_URL, api_key=API_KEY, max_concurrency=8, timeout=30.0,
+                 retries=3, backoff=0.5, batch_size=1):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = None
+
+    def _get_client(self):
+        # Created lazily so the client binds to the running event loop
+        if self.client is None:
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self.client = httpx.AsyncClient(base_url=self.api_url, headers={"api_key": self.api_key},
+                                            limits=limits, timeout=self.timeout)
+        return self.client
+
+    async def _post(self, path, files):
+        """
+        Posts files to the SR service, retrying transport errors and 5xx responses.
+
+        Returns the parsed JSON body, or None once all attempts have failed.
+        """
+        client = self._get_client()
+        for attempt in range(self.retries + 1):
+            try:
+                response = await client.post(path, files=files)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code < 500:
+                    logger.error(f"SR error {response.status_code}: {response.text}")
+                    return None
+                logger.warning(f"SR returned {response.status_code} (attempt {attempt + 1})")
+            except (httpx.TransportError, json.JSONDecodeError) as e:
+                logger.warning(f"SR request failed (attempt {attempt + 1}): {e!r}")
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+        logger.error("SR API is not working")
+        return None
+
+    async def recognize(self, audio_bytes):
+        """
+        Returns the speaker name for a single WAV clip, or None on failure.
+        """
+        return await self._recognize_one(audio_bytes, None)
+
+    async def _recognize_batch(self, clips, encode):
+        async with self.semaphore:
+            files = [("video_files", (f"chunk_{i}.wav", encode(clip) if encode else clip, "audio/wav"))
+                     for i, clip in enumerate(clips)]
+            data = await self._post("/Speaker_Recognition_batch/", files)
+        if not isinstance(data, list) or len(data) != len(clips):
+            return [None] * len(clips)
+        return [parse_person(entry) for entry in data]
+
+    async def _recognize_one(self, clip, encode):
+        async with self.semaphore:
+            files = {"video_file": ("chunk.wav", encode(clip) if encode else clip, "audio/wav")}
+            data = await self._post("/Speaker_Recognition/", files)
+        return parse_person(data) if data is not None else None
+
+    async def recognize_many(self, clips, encode=None):
+        """
+        Recognizes the speakers of many clips concurrently.
+
+        Args:
+            clips (list): WAV bytes, or raw clips when encode is given.
+            encode (callable): Turns a clip into WAV bytes. It runs under the
+                concurrency limit, so only max_concurrency bodies are held at once.
+
+        Returns:
+            list: Speaker names (or None) in the same order as clips.
+        """
+        if self.batch_size > 1:
+            batches = [clips[i:i + self.batch_size] for i in range(0, len(clips), self.batch_size)]
+            results = await asyncio.gather(*(self._recognize_batch(batch, encode) for batch in batches))
+            return [name for batch in results for name in batch]
+        return list(await asyncio.gather(*(self._recognize_one(clip, encode) for clip in clips)))
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
 if __name__ == "__main__":
     FILE_PATH = "test.wav"
     print(speaker_recognition(file_path=FILE_PATH))
@@ -0,0 +1,95 @@
+import math
+import logging
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionTicket:
+    def __init__(self, client_id, audio_seconds):
+        self.client_id = client_id
+        self.audio_seconds = audio_seconds
+
+
+class AdmissionController:
+    """
+    Admits requests by estimated work rather than by count.
+
+    Every admitted request adds its audio duration to the backlog until it is
+    released. A request is refused with 429 when it would push the backlog past
+    max_backlog_seconds, or push its client past a fair share of that budget
+    (the budget split evenly between clients that currently have work in
+    flight). Retry-After is the time the service needs, at its measured
+    throughput, to work off the excess.
+    """
+
+    def __init__(self, max_backlog_seconds, concurrency, initial_real_time_factor=0.05, smoothing=0.2,
+                 min_retry_after=1, max_retry_after=600):
+        self.max_backlog_seconds = max_backlog_seconds
+        self.concurrency = concurrency
+        self.real_time_factor = initial_real_time_factor
+        self.smoothing = smoothing
+        self.min_retry_after = min_retry_after
+        self.max_retry_after = max_retry_after
+        self.backlog_seconds = 0.0
+        self.client_seconds = {}
+
+    def backlog(self):
+        return self.backlog_seconds
+
+    def throughput(self):
+        """Audio seconds processed per wall-clock second with every slot busy."""
+        return self.concurrency / max(self.real_time_factor, 1e-6)
+
+    def _retry_after(self, excess_seconds):
+        seconds = math.ceil(excess_seconds / self.throughput())
+        return min(max(seconds, self.min_retry_after), self.max_retry_after)
+
+    def admit(self, client_id, audio_seconds):
+        """
+        Admits a request or raises HTTPException(429).
+
+        Parameters:
+        - client_id: Key that fair sharing is computed over (the API key).
+        - audio_seconds: Probed media duration; None is admitted at no cost.
+
+        Returns:
+        - AdmissionTicket to pass to release().
+        """
+        audio_seconds = audio_seconds or 0.0
+        client_backlog = self.client_seconds.get(client_id, 0.0)
+        # An idle service always takes the request, however long it is
+        if self.backlog_seconds > 0:
+            active_clients = len(self.client_seconds) + (client_id not in self.client_seconds)
+            fair_share = self.max_backlog_seconds / active_clients
+            excess = self.backlog_seconds + audio_seconds - self.max_backlog_seconds
+            # A client with nothing in flight is only held to the global budget
+            if client_backlog > 0:
+                excess = max(excess, client_backlog + audio_seconds - fair_share)
+            if excess > 0:
+                retry_after = self._retry_after(excess)
+                logger.warning(f"Rejected {audio_seconds:.0f}s of audio; backlog {self.backlog_seconds:.0f}s, "
+                               f"retry after {retry_after}s")
+                raise HTTPException(status_code=429, detail="Transcription backlog is full",
+                                    headers={"Retry-After": str(retry_after)})
+
+        self.backlog_seconds += audio_seconds
+        self.client_seconds[client_id] = client_backlog + audio_seconds
+        return AdmissionTicket(client_id, audio_seconds)
+
+    def release(self, ticket, processing_seconds=None):
+        """
+        Removes a finished request from the backlog.
+
+        Parameters:
+        - processing_seconds: Wall time the request spent being processed; updates
+          the throughput estimate. Leave None for cache hits and failures.
+        """
+        self.backlog_seconds = max(self.backlog_seconds - ticket.audio_seconds, 0.0)
+        remaining = self.client_seconds.get(ticket.client_id, 0.0) - ticket.audio_seconds
+        if remaining > 0:
+            self.client_seconds[ticket.client_id] = remaining
+        else:
+            self.client_seconds.pop(ticket.client_id, None)
+        if processing_seconds is not None and ticket.audio_seconds > 0:
+            self.real_time_factor += self.smoothing * (processing_seconds / ticket.audio_seconds - self.real_time_factor)
@@ -0,0 +1,200 @@
+import time
+import asyncio
+import logging
+import numpy as np
+import ctranslate2
+from faster_whisper.tokenizer import Tokenizer
+from inference import split_timestamped_tokens
+from metrics import BATCH_SIZE, BATCH_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class DynamicBatcher:
+    """
+    Cross-request micro-batcher in front of the Whisper model.
+
+    Every request is cut into 30-second windows. Windows from all in-flight
+    requests are gathered until max_batch_size windows are pending or the oldest
+    has waited max_wait_ms, then decoded in one CTranslate2 generate call.
+    Each decoded window is routed back to the request that owns it.
+
+    This is opt-in. Windows are fixed and non-overlapping, with no seek back
+    to the last timestamp, and there is no no-speech, log-probability or
+    compression-ratio check and no temperature fallback, so words at window
+    edges and silent or music-only windows come out worse than with
+    WhisperModel.transcribe.
+    """
+
+    def __init__(self, executor, max_batch_size=8, max_wait_ms=50):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.collector = None
+        # Running _dispatch tasks and their batches, referenced until they finish
+        self.dispatches = {}
+        self.tokenizers = {}
+
+    @property
+    def model(self):
+        # Read through the executor, which may still be loading the model in the background
+        return self.executor.model
+
+    def start(self):
+        # Called from the app's startup hook so the queue binds to the running loop
+        self.queue = asyncio.Queue()
+        self.collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        tasks = list(self.dispatches)
+        items = [item for batch in self.dispatches.values() for item in batch]
+        if self.collector is not None:
+            tasks.append(self.collector)
+            self.collector = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Windows still in a batch or the queue would otherwise leave their requests waiting forever
+        while self.queue is not None and not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        for item in items:
+            item["future"].cancel()
+
+    def _get_tokenizer(self, task, language):
+        key = (task, language)
+        if key not in self.tokenizers:
+            self.tokenizers[key] = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual,
+                                             task=task, language=language)
+        return self.tokenizers[key]
+
+    def _split_windows(self, audio):
+        # Log-mel features cut into zero-padded 30-second windows
+        feature_extractor = self.model.feature_extractor
+        window_frames = feature_extractor.nb_max_frames
+        duration = len(audio) / feature_extractor.sampling_rate
+        features = feature_extractor(audio)
+        content_frames = min(features.shape[-1], len(audio) // feature_extractor.hop_length)
+
+        windows = []
+        for seek in range(0, content_frames, window_frames):
+            window = features[:, seek:seek + window_frames]
+            if window.shape[-1] < window_frames:
+                window = np.pad(window, ((0, 0), (0, window_frames - window.shape[-1])))
+            time_offset = seek * feature_extractor.time_per_frame
+            windows.append((window, time_offset, min(time_offset + feature_extractor.chunk_length, duration)))
+        return windows
+
+    def _detect_language(self, window):
+        features = ctranslate2.StorageView.from_array(np.ascontiguousarray(window[None]))
+        language_token, _ = self.model.model.detect_language(features)[0][0]
+        return language_token[2:-2]
+
+    def _run_batch(self, batch):
+        """Decodes one batch of windows that share decode options; runs on the executor pool."""
+        features = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack([item["window"] for item in batch])))
+        prompts = [self.model.get_prompt(item["tokenizer"], []) for item in batch]
+        options = batch[0]["options"]
+        results = self.model.model.generate(
+            features,
+            prompts,
+            beam_size=options["beam_size"],
+            no_repeat_ngram_size=options["no_repeat_ngram_size"],
+            max_length=self.model.max_length,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        return [split_timestamped_tokens(item["tokenizer"], result.sequences_ids[0], item["time_offset"],
+                                         item["window_end"], self.model.time_precision)
+                for item, result in zip(batch, results)]
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            outputs = await loop.run_in_executor(self.executor.pool, self._run_batch, batch)
+        except Exception as e:
+            for item in batch:
+                if not item["future"].done():
+                    item["future"].set_exception(e)
+            return
+        for item, segments in zip(batch, outputs):
+            if not item["future"].done():
+                item["future"].set_result(segments)
+
+    async def _collect(self):
+        pending = []
+        try:
+            while True:
+                pending = [await self.queue.get()]
+                deadline = pending[0]["enqueued_at"] + self.max_wait
+                while len(pending) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        pending.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                now = time.perf_counter()
+                # Beam size and n-gram settings are per generate call, so batch only matching windows
+                groups = {}
+                for item in pending:
+                    BATCH_WAIT_SECONDS.observe(now - item["enqueued_at"])
+                    groups.setdefault(tuple(sorted(item["options"].items())), []).append(item)
+                for batch in groups.values():
+                    BATCH_SIZE.observe(len(batch))
+                    task = asyncio.create_task(self._dispatch(batch))
+                    self.dispatches[task] = batch
+                    task.add_done_callback(self.dispatches.pop)
+                pending = []
+        except asyncio.CancelledError:
+            # Windows taken off the queue but not yet dispatched
+            for item in pending:
+                item["future"].cancel()
+            raise
+
+    async def transcribe(self, audio, language=None, task="transcribe", beam_size=5, no_repeat_ngram_size=0,
+                         **unused_params):
+        """
+        Transcribe audio through the shared batch queue.
+
+        Parameters:
+        - audio: 16 kHz mono float32 numpy array.
+        - language, task, beam_size, no_repeat_ngram_size: Decode settings; other
+          WhisperModel.transcribe options do not apply to windowed decoding.
+
+        Returns:
+        - (segment_info, info): Segment dicts in time order and a dict with the
+          language and duration.
+        """
+        if unused_params:
+            logger.warning(f"Options not supported by cross-request batching were ignored: {sorted(unused_params)}")
+        await self.executor.wait_ready()
+        loop = asyncio.get_running_loop()
+        windows = await loop.run_in_executor(self.executor.pool, self._split_windows, audio)
+        if not windows:
+            return [], {"language": language, "duration": 0.0}
+        if language is None:
+            language = await loop.run_in_executor(self.executor.pool, self._detect_language, windows[0][0])
+
+        tokenizer = self._get_tokenizer(task, language)
+        options = {"beam_size": beam_size, "no_repeat_ngram_size": no_repeat_ngram_size}
+        futures = []
+        for window, time_offset, window_end in windows:
+            future = loop.create_future()
+            self.queue.put_nowait({
+                "window": window,
+                "time_offset": time_offset,
+                "window_end": window_end,
+                "tokenizer": tokenizer,
+                "options": options,
+                "future": future,
+                "enqueued_at": time.perf_counter(),
+            })
+            futures.append(future)
+
+        segment_info = []
+        for window_segments in await asyncio.gather(*futures):
+            segment_info.extend(window_segments)
+        return segment_info, {"language": language, "duration": windows[-1][2]}
@@ -0,0 +1,183 @@
+import os
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(content_hash, **settings):
+    """
+    Builds the cache key from the upload's content hash and the decode settings
+    (news_type, language, task, beam size, model id, ...).
+    """
+    payload = json.dumps({"content": content_hash, **settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_successful(result):
+    return "error" not in result
+
+
+class TranscriptionCache:
+    """
+    Content-addressed transcription result cache with an in-memory LRU tier and a
+    disk tier with size-based eviction. Concurrent misses on the same key are
+    coalesced into a single computation.
+    """
+
+    def __init__(self, cache_dir, max_memory_entries=256, max_disk_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.inflight = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # Index of the disk tier: key -> (size in bytes, last access time)
+        self.disk_index = {}
+        for name in os.listdir(cache_dir):
+            if name.endswith(".json"):
+                path = os.path.join(cache_dir, name)
+                self.disk_index[name[:-5]] = (os.path.getsize(path), os.path.getmtime(path))
+        self.disk_bytes = sum(size for size, _ in self.disk_index.values())
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        with open(self._disk_path(key), "r", encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+
+    def _write_disk(self, key, result):
+        path = self._disk_path(key)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(result, cache_file, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+    def _select_evictions(self):
+        # Runs on the event loop, the only place disk_index changes; drops least recently used
+        # entries from the index until the disk tier fits its budget and returns their files
+        paths = []
+        for key, _ in sorted(self.disk_index.items(), key=lambda item: item[1][1]):
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            size, _ = self.disk_index.pop(key)
+            self.disk_bytes -= size
+            self.stats["evictions"] += 1
+            paths.append(self._disk_path(key))
+        return paths
+
+    def _remove_files(self, paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _forget_disk(self, key):
+        size, _ = self.disk_index.pop(key, (0, 0))
+        self.disk_bytes -= size
+
+    async def get(self, key):
+        """Returns a copy of the cached result, or None; callers may modify it freely."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return copy.deepcopy(self.memory[key])
+        if key in self.disk_index:
+            try:
+                result = await asyncio.to_thread(self._read_disk, key)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+                self._forget_disk(key)
+                return None
+            # The entry may have been evicted or rewritten while the file was being read
+            entry = self.disk_index.get(key)
+            if entry is not None:
+                self.disk_index[key] = (entry[0], time.time())
+            self.stats["disk_hits"] += 1
+            self._remember(key, result)
+            return copy.deepcopy(result)
+        return None
+
+    async def put(self, key, result):
+        # Keep a private copy so later changes by the caller do not reach the cache
+        result = copy.deepcopy(result)
+        self._remember(key, result)
+        size = await asyncio.to_thread(self._write_disk, key, result)
+        previous_size, _ = self.disk_index.get(key, (0, 0))
+        self.disk_index[key] = (size, time.time())
+        self.disk_bytes += size - previous_size
+        if self.disk_bytes > self.max_disk_bytes:
+            paths = self._select_evictions()
+            await asyncio.to_thread(self._remove_files, paths)
+
+    async def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Returns the cached result for key, or awaits compute() and caches its result.
+        Identical requests arriving while compute() runs wait for the same result.
+
+        Parameters:
+        - key: Cache key from make_cache_key.
+        - compute: Zero-argument coroutine function producing the result.
+        - cacheable: Predicate deciding whether a result may be stored; by default
+          anything without an "error" key is.
+
+        Returns:
+        - (result, hit): The result and whether it came from the cache.
+        """
+        result = await self.get(key)
+        if result is not None:
+            return result, True
+
+        if key in self.inflight:
+            self.stats["coalesced"] += 1
+            return copy.deepcopy(await asyncio.shield(self.inflight[key])), True
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await compute()
+            future.set_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting on it
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+        # Only successful transcriptions are worth keeping
+        if (cacheable or is_successful)(result):
+            try:
+                await self.put(key, result)
+            except OSError as e:
+                logger.warning(f"Could not write cache entry {key}: {e}")
+        return result, False
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk_index),
+            "disk_bytes": self.disk_bytes,
+            "inflight": len(self.inflight),
+        }
@@ -0,0 +1,117 @@
+import numpy as np
+from utils import SAMPLE_RATE
+
+# Frame settings for the MFCC front-end (25 ms window, 10 ms hop at 16 kHz)
+FRAME_LENGTH = 400
+HOP_LENGTH = 160
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20
+
+
+def _mel_filterbank(n_mels=N_MELS, n_fft=N_FFT, sampling_rate=SAMPLE_RATE):
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(sampling_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sampling_rate).astype(int)
+    filterbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            filterbank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filterbank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filterbank
+
+
+def _dct_matrix(n_mfcc=N_MFCC, n_mels=N_MELS):
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    return (np.cos(np.pi / n_mels * (n + 0.5) * k) * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+
+MEL_FILTERBANK = _mel_filterbank()
+DCT_MATRIX = _dct_matrix()
+WINDOW = np.hamming(FRAME_LENGTH).astype(np.float32)
+# Fixed weights for the embedding's c1..c19 means and standard deviations. Higher cepstra are
+# naturally smaller, so weighting coefficient k by k keeps c1-c2 from dominating the cosine
+# similarity. The weights are the same for every file, so one voice across all segments stays one voice
+EMBEDDING_WEIGHTS = np.tile(np.arange(1, N_MFCC, dtype=np.float32), 2)
+
+
+def mfcc(samples):
+    """
+    Computes MFCCs for a mono 16 kHz clip.
+
+    :param samples: 1-D float32 numpy array.
+    :return: Array of shape (num_frames, N_MFCC).
+    """
+    if len(samples) < FRAME_LENGTH:
+        samples = np.pad(samples, (0, FRAME_LENGTH - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH]
+    power = np.abs(np.fft.rfft(frames * WINDOW, n=N_FFT)) ** 2
+    log_mel = np.log(power @ MEL_FILTERBANK.T + 1e-10)
+    return log_mel @ DCT_MATRIX.T
+
+
+def speaker_embedding(samples):
+    """
+    Lightweight speaker embedding: mean and standard deviation of the MFCCs
+    (without c0, which mostly tracks loudness).
+    """
+    coefficients = mfcc(samples)[:, 1:]
+    return np.concatenate([coefficients.mean(axis=0), coefficients.std(axis=0)])
+
+
+def cluster_speakers(clips, threshold=0.85, max_speakers=None):
+    """
+    Groups clips by speaker with centroid-linkage agglomerative clustering
+    on cosine similarity.
+
+    Parameters:
+    - clips: List of 1-D float32 numpy arrays (one per segment).
+    - threshold: Clusters stop merging once the closest pair is less similar than this.
+    - max_speakers: Optional upper bound on the number of clusters.
+
+    Returns:
+    - labels: Cluster index for every clip.
+    - representatives: For every cluster, the index of the clip closest to its centroid.
+    """
+    if not clips:
+        return [], []
+
+    embeddings = np.stack([speaker_embedding(clip) for clip in clips]) * EMBEDDING_WEIGHTS
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8
+
+    labels = np.arange(len(clips))
+    sums = embeddings.copy()
+    active = np.ones(len(clips), dtype=bool)
+
+    while active.sum() > 1:
+        centroids = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-8)
+        similarity = centroids @ centroids.T
+        similarity[~active, :] = -np.inf
+        similarity[:, ~active] = -np.inf
+        np.fill_diagonal(similarity, -np.inf)
+        i, j = np.unravel_index(np.argmax(similarity), similarity.shape)
+        if similarity[i, j] < threshold and (max_speakers is None or active.sum() <= max_speakers):
+            break
+        # Merge cluster j into cluster i
+        sums[i] += sums[j]
+        active[j] = False
+        labels[labels == j] = i
+
+    # Relabel clusters as 0..k-1 in order of first appearance
+    cluster_ids = list(dict.fromkeys(labels.tolist()))
+    representatives = []
+    for cluster_id in cluster_ids:
+        members = np.flatnonzero(labels == cluster_id)
+        centroid = sums[cluster_id] / (np.linalg.norm(sums[cluster_id]) + 1e-8)
+        representatives.append(int(members[np.argmax(embeddings[members] @ centroid)]))
+    new_ids = {cluster_id: k for k, cluster_id in enumerate(cluster_ids)}
+
+    return [new_ids[label] for label in labels.tolist()], representatives
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+import numpy as np
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+async def decode_audio_with_ffmpeg(file_path, sampling_rate=SAMPLE_RATE):
+    """
+    Decodes the audio track of any audio or video file to mono float32 samples.
+    ffmpeg resamples once and writes raw PCM to a pipe, so no intermediate WAV touches disk.
+
+    :param file_path: Path to the uploaded audio or video file.
+    :param sampling_rate: Target sampling rate (Whisper expects 16 kHz).
+    :return: 1-D float32 numpy array.
+    """
+    command = [
+        'ffmpeg', '-nostdin', '-i', file_path, '-vn',
+        '-f', 'f32le', '-acodec', 'pcm_f32le', '-ar', str(sampling_rate), '-ac', '1',
+        '-loglevel', 'error', 'pipe:1'
+    ]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        logger.error(f"ffmpeg failed on {file_path}: {stderr.decode(errors='ignore').strip()}")
+        raise HTTPException(status_code=500, detail="Failed to extract audio from video.")
+
+    # Check that the file actually had an audio track
+    if len(stdout) == 0:
+        raise HTTPException(status_code=404, detail="No audio found in the provided video.")
+
+    return np.frombuffer(stdout, dtype=np.float32)
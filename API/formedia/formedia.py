@@ -5,17 +5,56 @@ import shutil
 import logging
 import asyncio
 import time
-import aiofiles
-from SR import speaker_recognition
-from fastapi import FastAPI, UploadFile, Depends, HTTPException, Header
-from faster_whisper import WhisperModel
+import json
+import copy
+from SR import SpeakerRecognitionClient
+from diarization import cluster_speakers
+from fastapi import FastAPI, UploadFile, Depends, HTTPException, Header, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from inference import InferenceExecutor
+from batcher import DynamicBatcher
+from model_client import ModelHostClient
+from stub_model import StubExecutor
+from runtime_profile import load_profile
+from cache import TranscriptionCache, make_cache_key
+from jobs import JobQueue
+from scratch import ScratchSpace
+from admission import AdmissionController
+from metrics import registry, STAGE_SECONDS, REQUESTS, IN_FLIGHT_REQUESTS, IN_FLIGHT_INFERENCE, QUEUE_DEPTH, BACKLOG_AUDIO_SECONDS, COLD_START_SECONDS, observe_transcription, observe_request
 import torch
 import re  # To help with text cleanup
 from utils import *
 app = FastAPI()
 
 model_size = "large-v2"
-model = WhisperModel(model_size, device="cuda", compute_type="float16")
+# Device, precision, threading and beam size tuned for this host by runtime_profile.py
+runtime_profile = load_profile(model_size)
+# Speech pieces of one file decoded together; 1 disables batched decoding
+batch_size = 8
+# Opt-in (STT_CROSS_REQUEST_BATCHING=1): gathers 30-second windows across in-flight requests into shared
+# batches (up to 8 windows or 50 ms). Windows are fixed and decoded without faster-whisper's seek
+# realignment, no-speech filtering or temperature fallback, so transcripts can differ at window edges
+# and over silence or music; the default path is WhisperModel.transcribe
+cross_request_batching = os.environ.get("STT_CROSS_REQUEST_BATCHING") == "1"
+# When set, decodes go to the shared model host (model_host.py) instead of a model loaded here
+model_host_socket = os.environ.get("STT_MODEL_HOST_SOCKET")
+# When set (to a real-time factor), a GPU-free stub replaces the model for load tests (load_test.py)
+stub_model_rtf = os.environ.get("STT_STUB_MODEL")
+if stub_model_rtf:
+    executor = StubExecutor(model_size, real_time_factor=float(stub_model_rtf), max_workers=4)
+    batcher = None
+elif model_host_socket:
+    executor = ModelHostClient(model_host_socket, model_size, max_workers=4)
+    # The host runs its own micro-batcher across all front-ends
+    batcher = None
+else:
+    # Bounded worker pool that owns the model; decoding never runs on the event loop
+    executor = InferenceExecutor(model_size, device=runtime_profile["device"],
+                                 compute_type=runtime_profile["compute_type"],
+                                 cpu_threads=runtime_profile["cpu_threads"],
+                                 max_workers=runtime_profile["num_workers"], batch_size=batch_size,
+                                 load_in_background=True)
+    batcher = DynamicBatcher(executor, max_batch_size=8, max_wait_ms=50) if cross_request_batching else None
 
 # Configure logging to file
 logging.basicConfig(level=logging.INFO,
@@ -26,11 +65,8 @@ logging.basicConfig(level=logging.INFO,
                     ])
 logger = logging.getLogger(__name__)
 
-# Define a directory to store uploaded videos and audio
-upload_dir = "formedia_uploads"
-if os.path.exists(upload_dir):
-    shutil.rmtree(upload_dir)
-os.makedirs(upload_dir, exist_ok=True)
+# One unique scratch directory per request: tmpfs while uploads fit the RAM budget, ./formedia_uploads otherwise
+scratch = ScratchSpace("formedia_uploads", disk_root=".", tmpfs_budget_bytes=4 * 1024 ** 3, max_bytes=50 * 1024 ** 3)
 
 user_api_keys = {
     "user1": "apikey1",
@@ -38,101 +74,362 @@ user_api_keys = {
     # Add more users and their API keys as needed
 }
 
-# Semaphore to limit concurrent requests to 4
-semaphore = asyncio.Semaphore(4)
+# Pooled keep-alive client for the remote Speaker_Recognition service
+sr_client = SpeakerRecognitionClient(max_concurrency=8, timeout=30.0, retries=3)
 
-async def process_video(file: UploadFile, news_type: str = None, language: str = None):
+# Content-addressed result cache: in-memory LRU in front of a size-bounded disk tier
+result_cache = TranscriptionCache("formedia_cache", max_memory_entries=256, max_disk_bytes=2 * 1024 ** 3)
+
+# Semaphore to limit concurrent inference jobs to 4
+semaphore = asyncio.Semaphore(executor.max_workers)
+
+# Requests are admitted by audio duration: at most 4 hours of audio queued or in progress,
+# split fairly between API keys; the rest get 429 with a Retry-After from measured throughput
+admission = AdmissionController(max_backlog_seconds=4 * 3600, concurrency=executor.max_workers)
+BACKLOG_AUDIO_SECONDS.set_function(admission.backlog)
+
+def get_transcribe_params(news_type, language, task=None):
+    """
+    Decode settings for a request. Unless a task is requested explicitly, live news
+    is transcribed and report/dataset is translated; "both" does both in one pass.
+    """
+    transcribe_params = {
+        "no_repeat_ngram_size": 2,
+        "beam_size": runtime_profile["beam_size"],
+        "condition_on_previous_text": False,
+        "language": language,
+        "task": task or ("transcribe" if news_type == "live" else "translate"),
+    }
+    return transcribe_params
+
+async def run_inference(transcribe, audio, **params):
+    # Time the wait for an inference slot separately from the decode itself
+    with STAGE_SECONDS.time(stage="inference_wait"):
+        await semaphore.acquire()
     try:
-        original_file_name = file.filename
-        file_folder = os.path.join(upload_dir, original_file_name)
-        os.makedirs(file_folder, exist_ok=True)
-        file_path = os.path.join(file_folder, original_file_name)
-
-        # Asynchronously read and write the file
-        async with aiofiles.open(file_path, "wb") as temp_file:
-            file_content = await file.read()
-            await temp_file.write(file_content)
-
-        # Video extensions list
-        video_extensions = [".mp4", ".avi", ".mov", ".wmv", ".mkv", ".flv"]
-        # Log the file size after saving the file
-        file_size = get_file_size(file_path)
-        readable_size = format_size(file_size)
-        logger.info(f"Uploaded file: {original_file_name}, Size: {readable_size}")
-
-        # Check if the file is a video
-        if any(file_path.lower().endswith(ext) for ext in video_extensions):
-            audio_file_path = os.path.join(file_folder, f"{original_file_name}.wav")
-            # Extract audio from video using FFmpeg (faster than moviepy)
-            await extract_audio_with_ffmpeg(file_path, audio_file_path)
-        else:
-            audio_file_path = file_path
-
-        # Transcription logic
-        transcribe_params = {
-            "no_repeat_ngram_size": 2,
-            "beam_size": 5,
-            "condition_on_previous_text": False,
-            "language": language,
-        }
+        with IN_FLIGHT_INFERENCE.track_inprogress():
+            start_time = time.perf_counter()
+            result = await transcribe(audio, **params)
+            time_taken = time.perf_counter() - start_time
+    finally:
+        semaphore.release()
+    STAGE_SECONDS.observe(time_taken, stage="transcription")
+    observe_transcription(time_taken, len(audio) / SAMPLE_RATE)
+    return result
 
-        if news_type == "live":
-            segments, info = model.transcribe(audio_file_path, **transcribe_params)
-            if language == "ur":
-                segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
-                full_text_urdu = ''.join([segment["text"] for segment in segment_info])
-                # Remove Hindi text if present in Urdu transcription
-                full_text_urdu = remove_hindi_text(full_text_urdu)
-                full_text_english = ""
-            else:
-                full_text_urdu = ""
-                segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
-                full_text_english = ''.join([segment["text"] for segment in segment_info])
-        else:
-            transcribe_params_report = transcribe_params.copy()
-            transcribe_params_report["task"] = "translate"
-            segments, info = model.transcribe(audio_file_path, **transcribe_params_report)
-            segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
-            full_text_english = ''.join([segment["text"] for segment in segment_info])
-            full_text_urdu = ""
-
-        # Merge segments into larger chunks (if needed)
+async def attribute_speakers(audio, segment_info):
+    # Merge segments into larger chunks (if needed)
+    with STAGE_SECONDS.time(stage="merging"):
         merged_segments = merge_segments(segment_info, max_length=3)
-        processed_segments=[]
-        for i, segment in enumerate(merged_segments, start=1):
-            # Define chunk file path
-            chunk_path = os.path.join(f"{audio_file_path}_chunk_{i}.mp3")
-
-            # Extract the audio chunk
-            extract_audio_clip(audio_file_path, segment['start'], segment['end'], chunk_path)
-
-            # Get the speaker name for the current chunk
-            speaker_name = speaker_recognition(chunk_path)
-
-            # Create the segment with speaker info
-            current_segment = {
-                "start": segment["start"],
-                "end": segment["end"],
-                "text":f"{speaker_name}, {segment['text']}",
-                "speaker_name": speaker_name
-            }
-
-            # Append the processed segment to the final list
-            processed_segments.append(current_segment)
-        # Clean up files
-        shutil.rmtree(file_folder, ignore_errors=True)
-
-        # Clear PyTorch GPU cache to free up memory (model remains loaded)
+    # Cut each chunk as a view over the decoded buffer; the SR client encodes it straight into the request body
+    clips = [slice_audio(audio, segment['start'], segment['end']) for segment in merged_segments]
+    # Cluster segments by voice locally so the remote SR runs once per speaker, not per segment
+    with STAGE_SECONDS.time(stage="diarization"):
+        labels, representatives = await asyncio.to_thread(cluster_speakers, clips)
+    with STAGE_SECONDS.time(stage="speaker_recognition"):
+        cluster_names = await sr_client.recognize_many([clips[i] for i in representatives], encode=encode_wav)
+    speaker_names = [cluster_names[label] for label in labels]
+
+    processed_segments=[]
+    for segment, speaker_name in zip(merged_segments, speaker_names):
+        # Create the segment with speaker info
+        current_segment = {
+            "start": segment["start"],
+            "end": segment["end"],
+            "text":f"{speaker_name}, {segment['text']}",
+            "speaker_name": speaker_name
+        }
+
+        # Append the processed segment to the final list
+        processed_segments.append(current_segment)
+    return processed_segments
+
+def build_full_texts(segment_info, language, task):
+    if task == "transcribe" and language == "ur":
+        full_text_urdu = ''.join([segment["text"] for segment in segment_info])
+        # Remove Hindi text if present in Urdu transcription
+        full_text_urdu = remove_hindi_text(full_text_urdu)
+        full_text_english = ""
+    else:
+        full_text_urdu = ""
+        full_text_english = ''.join([segment["text"] for segment in segment_info])
+    return full_text_urdu, full_text_english
+
+async def transcribe_file(file_path, news_type, language, transcribe_params):
+    # Decode audio or video straight to 16 kHz mono float32; later stages reuse this buffer
+    with STAGE_SECONDS.time(stage="ffmpeg"):
+        audio = await decode_audio_with_ffmpeg(file_path)
+
+    if transcribe_params["task"] == "both":
+        # Transcribe and translate with the standard decode; the Urdu field is only filled for Urdu sources
+        both_params = {key: value for key, value in transcribe_params.items() if key != "task"}
+        segment_info, translated_segments, source_language = await run_inference(executor.transcribe_both, audio,
+                                                                                  **both_params)
+        full_text_urdu = (remove_hindi_text(''.join([segment["text"] for segment in segment_info]))
+                          if source_language == "ur" else "")
+        full_text_english = ''.join([segment["text"] for segment in translated_segments])
+        processed_segments = await attribute_speakers(audio, segment_info)
         torch.cuda.empty_cache()
+        # The two decodes segment the audio independently; the translation is mapped onto the transcript's
+        # segments and merged the same way, so english_Timestamp lines up entry by entry with Timestamp
+        aligned_translation = align_segments(segment_info, translated_segments)
+        return {"urdu_full_text": full_text_urdu, "english_full_text": full_text_english,
+                "Timestamp": processed_segments,
+                "english_Timestamp": merge_segments(aligned_translation, max_length=3)}
+
+    # Transcription logic
+    transcribe = batcher.transcribe if uses_batcher(transcribe_params) else executor.transcribe
+    segment_info, info = await run_inference(transcribe, audio, **transcribe_params)
+    full_text_urdu, full_text_english = build_full_texts(segment_info, language, transcribe_params["task"])
+
+    processed_segments = await attribute_speakers(audio, segment_info)
+    # Clear PyTorch GPU cache to free up memory (model remains loaded)
+    torch.cuda.empty_cache()
+
+    return {"urdu_full_text": full_text_urdu, "english_full_text": full_text_english, "Timestamp": processed_segments}
+
+async def transcribe_file_streaming(file_path, news_type, language, transcribe_params, segment_sink):
+    """Like transcribe_file, but also puts each segment into segment_sink as soon as it is decoded."""
+    if transcribe_params["task"] == "both" or not hasattr(executor, "transcribe_stream"):
+        # The shared encoder pass and the model host return whole files; the stream gets the result when it is done
+        return await transcribe_file(file_path, news_type, language, transcribe_params)
+
+    with STAGE_SECONDS.time(stage="ffmpeg"):
+        audio = await decode_audio_with_ffmpeg(file_path)
+    with STAGE_SECONDS.time(stage="inference_wait"):
+        await semaphore.acquire()
+    segment_info = []
+    try:
+        with IN_FLIGHT_INFERENCE.track_inprogress():
+            start_time = time.perf_counter()
+            segments, info = await executor.transcribe_stream(audio, **transcribe_params)
+            async for segment in segments:
+                segment_info.append(segment)
+                # The sink is unbounded, so a slow reader never keeps the decode holding its slot
+                segment_sink.put_nowait(segment)
+            time_taken = time.perf_counter() - start_time
+    finally:
+        semaphore.release()
+    STAGE_SECONDS.observe(time_taken, stage="transcription")
+    observe_transcription(time_taken, len(audio) / SAMPLE_RATE)
+
+    full_text_urdu, full_text_english = build_full_texts(segment_info, language, transcribe_params["task"])
+    processed_segments = await attribute_speakers(audio, segment_info)
+    torch.cuda.empty_cache()
+    return {"urdu_full_text": full_text_urdu, "english_full_text": full_text_english, "Timestamp": processed_segments}
+
+async def save_upload(file: UploadFile):
+    original_file_name = os.path.basename(file.filename)
+    scratch_dir = scratch.allocate(getattr(file, "size", None))
+    file_path = os.path.join(scratch_dir.path, original_file_name)
+
+    # Stream the upload to scratch in chunks; peak memory stays at one chunk regardless of file size
+    try:
+        with STAGE_SECONDS.time(stage="upload"):
+            file_size, content_hash = await save_upload_streaming(file, file_path)
+    except BaseException:
+        scratch.release(scratch_dir)
+        raise
+    scratch.resize(scratch_dir, file_size)
+
+    # Log the file size after saving the file
+    readable_size = format_size(file_size)
+    logger.info(f"Uploaded file: {original_file_name}, Size: {readable_size}, SHA256: {content_hash}")
+    return scratch_dir, file_path, content_hash
+
+async def admit_upload(scratch_dir, file_path, api_key):
+    # Charge the request's audio duration against the backlog before any decoding
+    with STAGE_SECONDS.time(stage="probe"):
+        duration = await probe_media_duration(file_path)
+    try:
+        return admission.admit(api_key, duration), duration
+    except HTTPException:
+        REQUESTS.inc(outcome="rejected")
+        scratch.release(scratch_dir)
+        raise
+
+def is_cacheable(result):
+    # Results where speaker recognition failed for a segment are served but not kept
+    return "error" not in result and all(segment.get("speaker_name") is not None
+                                         for segment in result.get("Timestamp", []))
+
+def uses_batcher(transcribe_params, streaming=False):
+    # task=both and streamed decodes always run on the executor, even with the cross-request batcher enabled
+    if batcher is None or transcribe_params["task"] == "both":
+        return False
+    return not (streaming and hasattr(executor, "transcribe_stream"))
+
+def get_cache_key(content_hash, news_type, transcribe_params, streaming=False):
+    # Keyed by the decoder that actually produces the result, so batcher and executor results are never
+    # served for each other; batch_size only shapes the executor's own decode
+    if uses_batcher(transcribe_params, streaming):
+        decode_settings = {"cross_request_batching": True}
+    else:
+        decode_settings = {"batch_size": batch_size}
+    return make_cache_key(content_hash, news_type=news_type, model=model_size, **decode_settings,
+                          **transcribe_params)
 
-        return {"urdu_full_text": full_text_urdu, "english_full_text": full_text_english, "Timestamp": processed_segments}
+async def run_transcription(scratch_dir, file_path, content_hash, cache_key, news_type, language, task, ticket,
+                            enqueued_at, segment_sink=None):
+    STAGE_SECONDS.observe(time.time() - enqueued_at, stage="queue_wait")
+    IN_FLIGHT_REQUESTS.inc()
+    start_time = time.perf_counter()
+    # Only fresh, successful decodes update the throughput estimate
+    processing_seconds = None
+    try:
+        transcribe_params = get_transcribe_params(news_type, language, task)
+
+        # Streaming requests also receive each segment as it is decoded
+        if segment_sink is not None:
+            compute = lambda: transcribe_file_streaming(file_path, news_type, language, transcribe_params, segment_sink)
+        else:
+            compute = lambda: transcribe_file(file_path, news_type, language, transcribe_params)
+
+        # enqueue_video already served cached and queued keys; this still coalesces any that slipped past it
+        result, cache_hit = await result_cache.get_or_compute(cache_key, compute, cacheable=is_cacheable)
+        if cache_hit:
+            logger.info(f"Cache hit for file: {os.path.basename(file_path)}")
+        REQUESTS.inc(outcome="cache_hit" if cache_hit else ("error" if "error" in result else "ok"))
+        if not cache_hit and "error" not in result:
+            processing_seconds = time.perf_counter() - start_time
+
+        return result
 
     except HTTPException as e:
         logger.error(f"HTTPException: {e.detail}")
+        REQUESTS.inc(outcome="error")
         raise e
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
+        REQUESTS.inc(outcome="error")
         return {"error": f"Internal Error {str(e)}"}
+    finally:
+        queued_keys.pop(cache_key, None)
+        IN_FLIGHT_REQUESTS.dec()
+        admission.release(ticket, processing_seconds)
+        # Files are removed in the background
+        with STAGE_SECONDS.time(stage="cleanup"):
+            scratch.release(scratch_dir)
+
+async def stream_transcription(job_id, segment_sink):
+    """
+    Follows a queued job and yields records as they become available: a
+    "segment" record per decoded segment, a "speaker_segment" record per merged
+    segment once speakers are attributed, then a "summary" record holding the
+    same body /transcribe_video/ returns (or an "error" record). Cached and
+    coalesced results have no "segment" records.
+    """
+    start_time = time.perf_counter()
+    job = asyncio.ensure_future(job_queue.wait(job_id))
+    # Every segment is in the sink before the job finishes, so this marks the end of them
+    job.add_done_callback(lambda _: segment_sink.put_nowait(None))
+    try:
+        index = 0
+        while (segment := await segment_sink.get()) is not None:
+            if index == 0:
+                STAGE_SECONDS.observe(time.perf_counter() - start_time, stage="first_segment")
+            yield {"type": "segment", "index": index, **segment}
+            index += 1
+
+        result = await job
+        if "error" in result:
+            yield {"type": "error", "error": result["error"]}
+            return
+        for segment in result.get("Timestamp", []):
+            yield {"type": "speaker_segment", **segment}
+        yield {"type": "summary", **result, "time_taken": time.perf_counter() - start_time}
+
+    except Exception as e:
+        # The response has already started, so errors are reported in-band
+        error = e.detail if isinstance(e, HTTPException) else f"Internal Error {str(e)}"
+        logger.error(f"Error streaming video: {error}")
+        yield {"type": "error", "error": error}
+    finally:
+        # A client that disconnects only stops following the job; it still runs and its result is cached
+        job.cancel()
+        observe_request(time.perf_counter() - start_time)
+
+def format_stream_record(record, stream_format):
+    data = json.dumps(record, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {record['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+# Every transcription goes through the priority queue: live > report > dataset, and within a
+# class the shortest audio first; waiting jobs age by 10 audio-seconds per second so long ones still run
+job_queue = JobQueue(run_transcription, num_workers=executor.max_workers, throughput=admission.throughput,
+                     aging_rate=10.0)
+QUEUE_DEPTH.set_function(job_queue.depth)
+# Cache key -> id of the queued or running job decoding it, so identical uploads wait on that job
+queued_keys = {}
+
+def submit_without_decoding(news_type, webhook_url, cached=None, original_job_id=None):
+    # Cache hits and uploads already queued are not charged to the backlog and take no worker slot
+    REQUESTS.inc(outcome="cache_hit")
+
+    async def follow():
+        if cached is not None:
+            return cached
+        return copy.deepcopy(await job_queue.wait(original_job_id))
+
+    return job_queue.submit(news_type, None, webhook_url=webhook_url, handler=follow, queued=False)
+
+async def enqueue_video(file: UploadFile, news_type: str = None, language: str = None, task: str = None,
+                        webhook_url: str = None, api_key: str = None, segment_sink: asyncio.Queue = None):
+    scratch_dir, file_path, content_hash = await save_upload(file)
+    cache_key = get_cache_key(content_hash, news_type, get_transcribe_params(news_type, language, task),
+                              streaming=segment_sink is not None)
+
+    # Identical uploads are served from the cache, or wait on the job already decoding them
+    cached = await result_cache.get(cache_key)
+    if cached is not None or cache_key in queued_keys:
+        logger.info(f"Serving {os.path.basename(file_path)} without decoding "
+                    f"({'cache hit' if cached is not None else 'already queued'})")
+        scratch.release(scratch_dir)
+        return submit_without_decoding(news_type, webhook_url, cached, queued_keys.get(cache_key))
+
+    ticket, duration = await admit_upload(scratch_dir, file_path, api_key)
+    if cache_key in queued_keys:
+        # An identical upload was queued while this one was being probed
+        admission.release(ticket, None)
+        scratch.release(scratch_dir)
+        return submit_without_decoding(news_type, webhook_url, original_job_id=queued_keys[cache_key])
+    payload = {
+        "scratch_dir": scratch_dir,
+        "file_path": file_path,
+        "content_hash": content_hash,
+        "cache_key": cache_key,
+        "news_type": news_type,
+        "language": language,
+        "task": task,
+        "ticket": ticket,
+        "enqueued_at": time.time(),
+        "segment_sink": segment_sink,
+    }
+    job_id = job_queue.submit(news_type, payload, webhook_url=webhook_url, audio_seconds=duration)
+    queued_keys[cache_key] = job_id
+    return job_id
+
+async def process_video(file: UploadFile, news_type: str = None, language: str = None, task: str = None,
+                        api_key: str = None, response: Response = None):
+    try:
+        job_id = await enqueue_video(file, news_type, language, task, api_key=api_key)
+        if response is not None:
+            set_queue_headers(response, job_queue.status(job_id))
+        return await job_queue.wait(job_id)
+
+    except HTTPException as e:
+        logger.error(f"HTTPException: {e.detail}")
+        raise e
+    except Exception as e:
+        logger.error(f"Error processing video: {str(e)}")
+        return {"error": f"Internal Error {str(e)}"}
+
+def set_queue_headers(response, status):
+    # Where the request stood when it was queued; the body is unchanged
+    if "queue_position" in status:
+        response.headers["X-Queue-Position"] = str(status["queue_position"])
+        response.headers["X-Estimated-Start"] = f"{status['estimated_start_at']:.3f}"
 
 async def get_api_key(api_key: str = Header(None, convert_underscores=False)):
     if api_key not in user_api_keys.values():
@@ -157,27 +454,142 @@ async def get_news_type(news_type: str = Header(None, convert_underscores=False)
         raise HTTPException(status_code=401, detail="Invalid news_type value")
     return news_type.lower()
 
+task_list = ["transcribe", "translate", "both"]
+
+async def get_task(task: str = Header(None, convert_underscores=False)):
+    # Optional; when absent the task follows news_type
+    if task is None:
+        return None
+    if task.lower() not in task_list:
+        raise HTTPException(status_code=401, detail="Invalid task value")
+    return task.lower()
+
 @app.post("/transcribe_video/")
 async def transcribe_video_endpoint(
     video_file: UploadFile,
     api_key: str = Depends(get_api_key),
     news_type: str = Depends(get_news_type),
-    language: str = Depends(get_language_key)
+    language: str = Depends(get_language_key),
+    task: str = Depends(get_task),
+    response: Response = None
 ):
-    async with semaphore:
-        logger.info(f"Received request for transcribe_video with file: {video_file.filename}")
-        
-        start_time = time.time()  # Record the start time
-        
-        result = await process_video(video_file, news_type, language)
-        
-        end_time = time.time()  # Record the end time
-        time_taken = end_time - start_time  # Calculate the time difference
-        
-        # Log the time taken for the request along with the filename
-        logger.info(f"Processed file: {video_file.filename} in {time_taken:.2f} seconds")
-        
-        return result
+    logger.info(f"Received request for transcribe_video with file: {video_file.filename}")
+
+    start_time = time.time()  # Record the start time
+
+    # Waits on a priority-queued job; only the decode inside it takes a semaphore slot
+    result = await process_video(video_file, news_type, language, task, api_key, response)
+
+    end_time = time.time()  # Record the end time
+    time_taken = end_time - start_time  # Calculate the time difference
+
+    observe_request(time_taken)
+    # Log the time taken for the request along with the filename
+    logger.info(f"Processed file: {video_file.filename} in {time_taken:.2f} seconds")
+
+    return result
+
+
+stream_format_media_types = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+async def get_stream_format(stream_format: str = Header("ndjson", convert_underscores=False)):
+    if stream_format.lower() not in stream_format_media_types:
+        raise HTTPException(status_code=401, detail="Invalid stream_format value")
+    return stream_format.lower()
+
+@app.post("/transcribe_video/stream")
+async def transcribe_video_stream_endpoint(
+    video_file: UploadFile,
+    api_key: str = Depends(get_api_key),
+    news_type: str = Depends(get_news_type),
+    language: str = Depends(get_language_key),
+    task: str = Depends(get_task),
+    stream_format: str = Depends(get_stream_format)
+):
+    logger.info(f"Received streaming request for file: {video_file.filename}")
+    # Streams are queued like any other job; segments reach the client through the sink as they are decoded
+    segment_sink = asyncio.Queue()
+    job_id = await enqueue_video(video_file, news_type, language, task, api_key=api_key, segment_sink=segment_sink)
+
+    async def body():
+        async for record in stream_transcription(job_id, segment_sink):
+            yield format_stream_record(record, stream_format)
+
+    return StreamingResponse(body(), media_type=stream_format_media_types[stream_format],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/jobs/")
+async def submit_job_endpoint(
+    video_file: UploadFile,
+    api_key: str = Depends(get_api_key),
+    news_type: str = Depends(get_news_type),
+    language: str = Depends(get_language_key),
+    task: str = Depends(get_task),
+    webhook_url: str = Header(None, convert_underscores=False)
+):
+    logger.info(f"Received job for file: {video_file.filename}, news_type: {news_type}")
+    job_id = await enqueue_video(video_file, news_type, language, task, webhook_url=webhook_url, api_key=api_key)
+    status = job_queue.status(job_id)
+    return {"job_id": job_id, "status": status["status"], "queue_depth": job_queue.depth(),
+            "queue_position": status.get("queue_position", 0),
+            "estimated_start_at": status.get("estimated_start_at", status["started_at"])}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status_endpoint(job_id: str, api_key: str = Depends(get_api_key)):
+    status = job_queue.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result_endpoint(job_id: str, api_key: str = Depends(get_api_key)):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in ("queued", "running"):
+        return JSONResponse(status_code=202, content=job_queue.status(job_id))
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error_status"] or 500, detail=job["error"])
+    return job["result"]
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Returns immediately; the model loads and warms up in the background
+    executor.start()
+    if batcher is not None:
+        batcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    await job_queue.stop()
+    if batcher is not None:
+        await batcher.stop()
+    executor.shutdown()
+    await sr_client.aclose()
+    await scratch.drain()
+
+
+@app.get("/cache_stats")
+async def cache_stats(api_key: str = Depends(get_api_key)):
+    return result_cache.get_stats()
+
+
+@app.get("/scratch_stats")
+async def scratch_stats(api_key: str = Depends(get_api_key)):
+    return scratch.get_stats()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/live")
@@ -186,6 +598,14 @@ async def live_check():
     return {"live": True}
 
 
+@app.get("/ready")
+async def ready_check():
+    # Unlike /live, only reports ready once the model is loaded and warmed up
+    if not executor.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "error": executor.load_error})
+    return {"ready": True, "model": model_size, "cold_start_seconds": COLD_START_SECONDS.value}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=2000)
@@ -0,0 +1,246 @@
+import time
+import asyncio
+import threading
+import functools
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from faster_whisper import WhisperModel
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # faster_whisper < 1.1
+    BatchedInferencePipeline = None
+
+from metrics import MODEL_READY, MODEL_LOAD_SECONDS, MODEL_WARMUP_SECONDS, COLD_START_SECONDS, seconds_since_start
+
+logger = logging.getLogger(__name__)
+
+
+def split_timestamped_tokens(tokenizer, tokens, time_offset, window_end, time_precision=0.02):
+    """
+    Turns one window's generated tokens into timed segments. Whisper emits
+    <|t0|> text <|t1|><|t1|> text <|t2|> ...; trailing text without a closing
+    timestamp runs to window_end.
+    """
+    segments = []
+    text_tokens = []
+    start = time_offset
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            timestamp = time_offset + (token - tokenizer.timestamp_begin) * time_precision
+            if text_tokens:
+                segments.append({"start": start, "end": timestamp, "text": tokenizer.decode(text_tokens)})
+                text_tokens = []
+            start = timestamp
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        segments.append({"start": start, "end": window_end, "text": tokenizer.decode(text_tokens)})
+    return segments
+
+
+class InferenceExecutor:
+    """
+    Owns the WhisperModel and runs decoding jobs on a bounded worker pool so the
+    event loop stays free for uploads, ffmpeg extraction and health checks.
+
+    With load_in_background=True the model is not loaded in the constructor;
+    start() loads and warms it on the worker pool while the app is already
+    serving, and decodes wait until it is ready.
+    """
+
+    def __init__(self, model_size, device="cuda", compute_type="float16", max_workers=4, batch_size=1, cpu_threads=0,
+                 load_in_background=False):
+        self.model_size = model_size
+        self.max_workers = max_workers
+        # num_workers lets CTranslate2 run up to max_workers decodes in parallel
+        self.model_kwargs = {"device": device, "compute_type": compute_type, "cpu_threads": cpu_threads,
+                             "num_workers": max_workers}
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="whisper")
+
+        # With batch_size > 1 a file is split at speech boundaries (VAD) and its
+        # pieces are decoded batch_size at a time, then stitched back in time order.
+        # Segment boundaries then follow the VAD pieces, so they differ somewhat from
+        # sequential decoding (and so do the clips sent to speaker recognition)
+        self.batch_size = batch_size
+        self.model = None
+        self.batched_model = None
+        self.ready = False
+        self.ready_event = None
+        self.load_error = None
+        # Kept so the background load is not garbage-collected while it runs
+        self.load_task = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        if not load_in_background:
+            self.load()
+
+    def load(self):
+        """Loads the model and runs a short warm-up decode. Blocking."""
+        start_time = time.perf_counter()
+        self.model = WhisperModel(self.model_size, **self.model_kwargs)
+        if self.batch_size > 1:
+            if BatchedInferencePipeline is None:
+                logger.warning("faster_whisper has no BatchedInferencePipeline; decoding sequentially")
+            else:
+                self.batched_model = BatchedInferencePipeline(model=self.model)
+        self.load_seconds = time.perf_counter() - start_time
+
+        # One second of faint noise runs the encoder and a short decode, so CUDA/CT2
+        # initialisation is paid here rather than by the first request
+        start_time = time.perf_counter()
+        warmup_audio = np.random.default_rng(0).normal(0, 0.01, 16000).astype(np.float32)
+        segments, _ = self.model.transcribe(warmup_audio, beam_size=1, language="en")
+        list(segments)
+        self.warmup_seconds = time.perf_counter() - start_time
+
+        self.ready = True
+        MODEL_READY.set(1)
+        MODEL_LOAD_SECONDS.set(self.load_seconds)
+        MODEL_WARMUP_SECONDS.set(self.warmup_seconds)
+        COLD_START_SECONDS.set(seconds_since_start())
+        logger.info(f"Model {self.model_size} loaded in {self.load_seconds:.2f}s, warmed up in "
+                    f"{self.warmup_seconds:.2f}s; ready {seconds_since_start():.2f}s after start")
+
+    def start(self):
+        """Loads the model in the background; call from the app's startup hook."""
+        self.ready_event = asyncio.Event()
+        if self.ready:
+            self.ready_event.set()
+            return
+        self.load_task = asyncio.create_task(self._load_in_background())
+        self.load_task.add_done_callback(self._on_load_done)
+
+    def _on_load_done(self, task):
+        # _load_in_background records ordinary failures itself; this catches anything it lets through
+        if not task.cancelled() and task.exception() is not None:
+            self.load_error = str(task.exception())
+            logger.error(f"Background load of model {self.model_size} failed: {task.exception()!r}")
+
+    async def _load_in_background(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.pool, self.load)
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"Loading model {self.model_size} failed: {str(e)}")
+        finally:
+            self.ready_event.set()
+
+    async def wait_ready(self):
+        """Waits for the background load; raises if it failed."""
+        if not self.ready:
+            await self.ready_event.wait()
+        if self.load_error is not None:
+            raise RuntimeError(f"Model {self.model_size} failed to load: {self.load_error}")
+
+    def _decode(self, audio, params):
+        if self.batched_model is not None:
+            # The batched pipeline defaults to without_timestamps=True, which makes every VAD chunk
+            # (up to 30 s) a single segment; keep timestamp tokens so segments stay sentence-sized
+            params = {"without_timestamps": False, **params}
+            return self.batched_model.transcribe(audio, batch_size=self.batch_size, **params)
+        return self.model.transcribe(audio, **params)
+
+    def _run_transcribe(self, audio, params):
+        # model.transcribe yields segments lazily, so drain them on the worker thread
+        segments, info = self._decode(audio, params)
+        segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
+        return segment_info, info
+
+    def _run_transcribe_both(self, audio, params):
+        """
+        Runs the standard decode twice, once with task=transcribe and once with
+        task=translate, so both keep faster-whisper's seek realignment, no-speech
+        filtering and temperature fallback. The translation reuses the language
+        detected (or given) for the transcription.
+        """
+        segment_info, info = self._run_transcribe(audio, {**params, "task": "transcribe"})
+        translated_segments, _ = self._run_transcribe(audio, {**params, "task": "translate", "language": info.language})
+        return segment_info, translated_segments, info.language
+
+    async def transcribe_both(self, audio, **params):
+        """
+        Transcribe and translate audio in one job on the worker pool.
+
+        Parameters:
+        - audio: 16 kHz mono float32 numpy array.
+        - params: Keyword arguments forwarded to WhisperModel.transcribe; language may be None to auto-detect.
+
+        Returns:
+        - (transcribe_segments, translate_segments, language)
+        """
+        await self.wait_ready()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(self._run_transcribe_both, audio, params))
+
+    async def transcribe(self, audio, **params):
+        """
+        Transcribe audio on the worker pool.
+
+        Parameters:
+        - audio: Path to an audio file (or anything WhisperModel.transcribe accepts).
+        - params: Keyword arguments forwarded to WhisperModel.transcribe.
+
+        Returns:
+        - (segment_info, info): List of {'start', 'end', 'text'} dicts and the TranscriptionInfo.
+        """
+        await self.wait_ready()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(self._run_transcribe, audio, params))
+
+    def _run_transcribe_stream(self, audio, params, loop, queue, stop):
+        # Hands each segment to the event loop as soon as the decoder yields it
+        try:
+            segments, info = self._decode(audio, params)
+            loop.call_soon_threadsafe(queue.put_nowait, ("info", info))
+            for segment in segments:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait,
+                                          ("segment", {"start": segment.start, "end": segment.end, "text": segment.text}))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+
+    async def transcribe_stream(self, audio, **params):
+        """
+        Transcribe audio on the worker pool, handing segments over as they are decoded.
+
+        Parameters:
+        - audio: 16 kHz mono float32 numpy array (or anything WhisperModel.transcribe accepts).
+        - params: Keyword arguments forwarded to WhisperModel.transcribe.
+
+        Returns:
+        - (segments, info): An async iterator of {'start', 'end', 'text'} dicts and the
+          TranscriptionInfo, which is known once the language has been detected.
+        """
+        await self.wait_ready()
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        loop.run_in_executor(self.pool, self._run_transcribe_stream, audio, params, loop, queue, stop)
+
+        kind, value = await queue.get()
+        if kind == "error":
+            raise value
+
+        async def segments():
+            try:
+                while True:
+                    kind, value = await queue.get()
+                    if kind == "segment":
+                        yield value
+                    elif kind == "error":
+                        raise value
+                    else:
+                        return
+            finally:
+                # Stops the worker early when the consumer goes away, e.g. a client disconnect
+                stop.set()
+
+        return segments(), value
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,25 @@
+import json
+import struct
+
+# Framing for the model host's Unix socket.
+#
+# Frame: 8-byte header "!II" (header length, payload length), a JSON header and an
+# optional payload. Requests carry {"id", "model", "method", "params"} plus either
+# "audio_path" or a float32 16 kHz mono payload. Responses carry {"id", "ok",
+# "result"} or {"id", "ok": false, "error"}. Many requests can be in flight on one
+# connection; responses come back in completion order and are matched by id.
+
+DEFAULT_SOCKET_PATH = "/tmp/stt_model_host.sock"
+FRAME_HEADER = struct.Struct("!II")
+
+
+async def read_frame(reader):
+    header_length, payload_length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return header, payload
+
+
+def encode_frame(header, payload=b""):
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return FRAME_HEADER.pack(len(header_bytes), len(payload)) + header_bytes + payload
@@ -0,0 +1,163 @@
+import time
+import uuid
+import asyncio
+import logging
+import httpx
+from scheduler import ShortestJobFirstScheduler
+
+logger = logging.getLogger(__name__)
+
+# Lower value runs first: breaking news beats reports, which beat archive datasets
+NEWS_TYPE_PRIORITY = {
+    "live": 0,
+    "report": 1,
+    "dataset": 2,
+}
+
+
+class JobQueue:
+    """
+    Priority job queue for transcription requests. Jobs are ordered by news_type
+    priority, then shortest audio first with aging, and at most num_workers run
+    at a time.
+    """
+
+    def __init__(self, handler, num_workers=4, retention_seconds=3600, webhook_timeout=10.0, throughput=None,
+                 aging_rate=10.0):
+        self.handler = handler
+        self.num_workers = num_workers
+        self.retention_seconds = retention_seconds
+        self.webhook_timeout = webhook_timeout
+        # Without a measured throughput, assume each worker runs at 20x real time
+        self.scheduler = ShortestJobFirstScheduler(num_workers, throughput or (lambda: num_workers * 20.0),
+                                                   aging_rate=aging_rate)
+        self.jobs = {}
+        self.waiters = {}
+        self.entries = {}
+        self.tasks = set()
+
+    async def stop(self):
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def _purge_finished(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+            del self.waiters[job_id]
+
+    def submit(self, news_type, payload, webhook_url=None, audio_seconds=None, handler=None, queued=True):
+        """
+        Enqueue a job.
+
+        Parameters:
+        - news_type: Selects the priority class (live > report > dataset).
+        - payload: Keyword arguments passed to the handler.
+        - webhook_url: Optional URL that receives the finished job as JSON.
+        - audio_seconds: Probed media duration; shorter jobs run first within a class.
+        - handler: Runs this job instead of the queue's handler.
+        - queued: When False the job starts at once without taking a worker slot;
+          for jobs that do no decoding themselves, e.g. ones served from the cache.
+
+        Returns:
+        - The job id.
+        """
+        self._purge_finished()
+        job_id = uuid.uuid4().hex
+        priority = NEWS_TYPE_PRIORITY.get(news_type, max(NEWS_TYPE_PRIORITY.values()) + 1)
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued" if queued else "running",
+            "news_type": news_type,
+            "priority": priority,
+            "audio_seconds": audio_seconds,
+            "created_at": time.time(),
+            "started_at": None if queued else time.time(),
+            "finished_at": None,
+            "webhook_url": webhook_url,
+            "payload": payload,
+            "handler": handler or self.handler,
+            "result": None,
+            "error": None,
+            # HTTP status the result endpoint reports for a failed job
+            "error_status": None,
+        }
+        self.waiters[job_id] = asyncio.get_running_loop().create_future()
+        if queued:
+            self.entries[job_id] = self.scheduler.enqueue(audio_seconds, priority)
+        task = asyncio.create_task(self._run(job_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return job_id
+
+    async def wait(self, job_id):
+        """Waits for a job to finish and returns its result (re-raising its error)."""
+        return await asyncio.shield(self.waiters[job_id])
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        status = {key: value for key, value in job.items() if key not in ("payload", "handler", "result")}
+        entry = self.entries.get(job_id)
+        if job["status"] == "queued" and entry is not None:
+            status["queue_position"] = self.scheduler.position(entry)
+            status["estimated_start_at"] = self.scheduler.estimated_start(entry)
+        return status
+
+    def depth(self):
+        return self.scheduler.depth()
+
+    async def _notify(self, job):
+        try:
+            async with httpx.AsyncClient(timeout=self.webhook_timeout) as client:
+                await client.post(job["webhook_url"], json={**self.status(job["job_id"]), "result": job["result"]})
+        except httpx.HTTPError as e:
+            logger.warning(f"Webhook for job {job['job_id']} failed: {e!r}")
+
+    async def _run(self, job_id):
+        job = self.jobs[job_id]
+        waiter = self.waiters[job_id]
+        entry = self.entries.get(job_id)
+        try:
+            if entry is not None:
+                await self.scheduler.wait(entry)
+                job["status"] = "running"
+                job["started_at"] = time.time()
+            job["result"] = await job["handler"](**(job["payload"] or {}))
+            if "error" in job["result"]:
+                job["status"] = "failed"
+                job["error"] = job["result"]["error"]
+                job["error_status"] = 500
+            else:
+                job["status"] = "done"
+            waiter.set_result(job["result"])
+        except asyncio.CancelledError:
+            waiter.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            job["status"] = "failed"
+            job["error"] = getattr(e, "detail", str(e))
+            job["error_status"] = getattr(e, "status_code", 500)
+            waiter.set_exception(e)
+            # Mark the exception as retrieved when nobody is waiting on the job
+            waiter.exception()
+        finally:
+            if entry is not None:
+                self.scheduler.release(entry)
+                del self.entries[job_id]
+            job["finished_at"] = time.time()
+            job["payload"] = None
+            job["handler"] = None
+        if job["webhook_url"]:
+            # Keep a reference until the webhook is sent so the task is not garbage-collected
+            task = asyncio.create_task(self._notify(job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import numpy as np
+import httpx
+
+# Load generator for the transcription endpoints.
+#
+# Closed loop: --concurrency clients each send the next request as soon as the previous one returns.
+# Open loop: requests arrive as a Poisson process at --rate per second for --duration seconds,
+# regardless of how fast the service answers.
+#
+# To benchmark scheduling and I/O without a GPU, start the service against the stub model and the
+# stub SR server, e.g.
+#   python sr_stub_server.py --serve &
+#   SR_API_URL=http://127.0.0.1:8011/ STT_STUB_MODEL=0.05 python formedia.py
+#   python load_test.py --url http://127.0.0.1:2000 --mode open --rate 0.5 --duration 600
+
+DEFAULT_MIX = "20:0.6,120:0.25,600:0.1,3600:0.05"
+
+
+def parse_mix(mix):
+    """Parses "20:0.6,600:0.4" into [(20.0, 0.6), (600.0, 0.4)]: clip seconds and their share of requests."""
+    pairs = []
+    for item in mix.split(","):
+        seconds, weight = item.split(":")
+        pairs.append((float(seconds), float(weight)))
+    return pairs
+
+
+def build_corpus(corpus_dir, mix, clips_per_duration=3):
+    """
+    Generates distinct noise-plus-tone WAV clips for every duration in the mix with
+    ffmpeg, reusing ones already on disk.
+
+    Returns:
+    - {duration: [clip paths]}
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    corpus = {}
+    for seconds, _ in mix:
+        corpus[seconds] = []
+        for i in range(clips_per_duration):
+            path = os.path.join(corpus_dir, f"clip_{int(seconds)}s_{i}.wav")
+            if not os.path.exists(path):
+                command = [
+                    'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+                    '-f', 'lavfi', '-i', f"sine=frequency={220 * (i + 1)}:duration={seconds}",
+                    '-f', 'lavfi', '-i', f"anoisesrc=seed={i}:amplitude=0.05:duration={seconds}",
+                    '-filter_complex', 'amix=inputs=2', '-ar', '16000', '-ac', '1', path
+                ]
+                subprocess.run(command, check=True)
+            corpus[seconds].append(path)
+    return corpus
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+class LoadTest:
+    """
+    Runs a seeded request plan against one endpoint. The clip for every request
+    (and, in open loop, every arrival time) is drawn up front from the seed, so
+    two runs with the same arguments send the same traffic.
+    """
+
+    def __init__(self, url, endpoint, headers, corpus, mix, seed=0, unique_uploads=True, timeout=7200.0):
+        self.url = url.rstrip("/")
+        self.endpoint = endpoint
+        self.headers = headers
+        self.corpus = corpus
+        self.durations = [seconds for seconds, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.unique_uploads = unique_uploads
+        self.timeout = timeout
+        self.plan = []
+        self.records = []
+        self.clip_bytes = {}
+
+    def _plan_request(self):
+        seconds = self.rng.choices(self.durations, weights=self.weights)[0]
+        self.plan.append((seconds, self.rng.choice(self.corpus[seconds])))
+
+    def _load_clip(self, request_id):
+        seconds, path = self.plan[request_id]
+        if path not in self.clip_bytes:
+            with open(path, "rb") as f:
+                self.clip_bytes[path] = f.read()
+        body = self.clip_bytes[path]
+        if self.unique_uploads:
+            # Trailing bytes after the WAV data are ignored by ffmpeg but change the content hash,
+            # so every request misses the result cache
+            body = body + random.Random(self.seed * 1000003 + request_id).randbytes(16)
+        return seconds, path, body
+
+    async def _send(self, client, request_id):
+        seconds, path, body = self._load_clip(request_id)
+        record = {"id": request_id, "clip": os.path.basename(path), "audio_seconds": seconds,
+                  "sent_at": time.time()}
+        start_time = time.perf_counter()
+        try:
+            response = await client.post(f"{self.url}{self.endpoint}", headers=self.headers,
+                                         files={"video_file": (os.path.basename(path), body)})
+            record["status"] = response.status_code
+            # The services report processing failures as 200 with an "error" key
+            try:
+                if response.status_code == 200 and "error" in response.json():
+                    record["status"] = "app_error"
+            except ValueError:
+                record["status"] = "invalid_json"
+            record["queue_position"] = response.headers.get("X-Queue-Position")
+            record["retry_after"] = response.headers.get("Retry-After")
+        except httpx.HTTPError as e:
+            record["status"] = type(e).__name__
+        record["latency"] = time.perf_counter() - start_time
+        self.records.append(record)
+
+    async def run_closed(self, concurrency, num_requests):
+        for _ in range(num_requests):
+            self._plan_request()
+        counter = iter(range(num_requests))
+
+        async def client_loop(client):
+            for request_id in counter:
+                await self._send(client, request_id)
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+
+    async def run_open(self, rate, duration):
+        # Poisson arrivals: exponential gaps with mean 1 / rate
+        arrivals = []
+        arrival = self.rng.expovariate(rate)
+        while arrival < duration:
+            arrivals.append(arrival)
+            self._plan_request()
+            arrival += self.rng.expovariate(rate)
+
+        tasks = []
+        async with httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_connections=None)) as client:
+            start_time = time.perf_counter()
+            for request_id, arrival in enumerate(arrivals):
+                await asyncio.sleep(max(arrival - (time.perf_counter() - start_time), 0))
+                tasks.append(asyncio.create_task(self._send(client, request_id)))
+            await asyncio.gather(*tasks)
+
+    def report(self, wall_seconds):
+        ok = [r for r in self.records if r["status"] == 200]
+        latencies = [r["latency"] for r in ok]
+        statuses = {}
+        for r in self.records:
+            statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+        audio_seconds = sum(r["audio_seconds"] for r in ok)
+
+        report = {
+            "requests": len(self.records),
+            "succeeded": len(ok),
+            "error_rate": 1 - len(ok) / len(self.records) if self.records else 0.0,
+            "statuses": statuses,
+            "wall_seconds": wall_seconds,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+            # Audio-hours transcribed per wall-clock hour
+            "throughput_audio_hours_per_hour": audio_seconds / wall_seconds if wall_seconds else 0.0,
+            "by_duration": {},
+        }
+        for seconds in self.durations:
+            bucket = [r["latency"] for r in ok if r["audio_seconds"] == seconds]
+            report["by_duration"][f"{int(seconds)}s"] = {
+                "count": len(bucket),
+                "latency_p50": percentile(bucket, 50),
+                "latency_p95": percentile(bucket, 95),
+                "latency_p99": percentile(bucket, 99),
+            }
+        return report
+
+
+def print_report(report):
+    print(f"requests={report['requests']} succeeded={report['succeeded']} "
+          f"error_rate={report['error_rate']:.2%} statuses={report['statuses']}")
+    print(f"latency p50={report['latency_p50']:.2f}s p95={report['latency_p95']:.2f}s "
+          f"p99={report['latency_p99']:.2f}s")
+    print(f"throughput={report['throughput_audio_hours_per_hour']:.2f} audio-hours/hour "
+          f"over {report['wall_seconds']:.0f}s")
+    for bucket, stats in report["by_duration"].items():
+        print(f"  {bucket:>6}: n={stats['count']:<5} p50={stats['latency_p50']:.2f}s "
+              f"p95={stats['latency_p95']:.2f}s p99={stats['latency_p99']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the transcription endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:2000")
+    parser.add_argument("--endpoint", default="/transcribe_video/")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="Closed loop: total requests")
+    parser.add_argument("--rate", type=float, default=0.5, help="Open loop: mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=300, help="Open loop: seconds to keep sending")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="clip_seconds:weight,... request duration mix")
+    parser.add_argument("--corpus-dir", default="load_test_corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-unique-uploads", action="store_true", help="Allow result-cache hits")
+    parser.add_argument("--api-key", default="apikey1")
+    parser.add_argument("--language", default="urdu")
+    parser.add_argument("--news-type", default="live")
+    parser.add_argument("--output", help="Write per-request records as JSON lines")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    load_test = LoadTest(args.url, args.endpoint,
+                         {"api_key": args.api_key, "language": args.language, "news_type": args.news_type},
+                         build_corpus(args.corpus_dir, mix), mix, seed=args.seed,
+                         unique_uploads=not args.no_unique_uploads)
+
+    start_time = time.perf_counter()
+    if args.mode == "closed":
+        asyncio.run(load_test.run_closed(args.concurrency, args.requests))
+    else:
+        asyncio.run(load_test.run_open(args.rate, args.duration))
+    report = load_test.report(time.perf_counter() - start_time)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for record in load_test.records:
+                f.write(json.dumps(record) + "\n")
+    print_report(report)
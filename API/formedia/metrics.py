@@ -0,0 +1,195 @@
+import time
+import math
+import threading
+from contextlib import contextmanager
+
+# Reference point for cold-start time; this module is imported while the app starts
+PROCESS_START_TIME = time.perf_counter()
+
+# Latency buckets in seconds, from sub-second stages up to hour-long decodes
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Cumulative histogram rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.labelnames = tuple(labelnames)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self.lock:
+            counts, total = self.series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (counts, total) in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, counts):
+                    labels = _format_labels(key + (("le", _format_value(bound)),))
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Gauge that is either set directly or read from a callback at scrape time.
+    """
+
+    def __init__(self, name, documentation, callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, callback):
+        self.callback = callback
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def render(self):
+        value = self.callback() if self.callback is not None else self.value
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {value}"]
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.series.items()):
+                lines.append(f"{self.name}_total{_format_labels(key)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS, labelnames=()):
+        metric = Histogram(name, documentation, buckets, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, callback=None):
+        metric = Gauge(name, documentation, callback)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Stages: upload, probe, queue_wait, ffmpeg, inference_wait, first_segment, transcription, merging,
+# diarization, speaker_recognition, cleanup, total
+STAGE_SECONDS = registry.histogram(
+    "stt_stage_duration_seconds", "Time spent in each request stage.", labelnames=("stage",))
+AUDIO_DURATION_SECONDS = registry.histogram(
+    "stt_audio_duration_seconds", "Duration of the decoded audio per request.")
+REAL_TIME_FACTOR = registry.histogram(
+    "stt_real_time_factor", "Transcription time divided by audio duration.",
+    buckets=(0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5))
+REQUESTS = registry.counter("stt_requests", "Transcription requests by outcome.", labelnames=("outcome",))
+IN_FLIGHT_REQUESTS = registry.gauge("stt_inflight_requests", "Requests currently being handled.")
+IN_FLIGHT_INFERENCE = registry.gauge("stt_inflight_inference", "Decodes currently running on the model.")
+QUEUE_DEPTH = registry.gauge("stt_queue_depth", "Requests waiting for an inference slot.")
+BACKLOG_AUDIO_SECONDS = registry.gauge(
+    "stt_backlog_audio_seconds", "Audio seconds admitted and not yet finished.")
+BATCH_SIZE = registry.histogram(
+    "stt_batch_size", "30-second windows decoded per micro-batch.", buckets=(1, 2, 4, 8, 16, 32, 64))
+BATCH_WAIT_SECONDS = registry.histogram(
+    "stt_batch_wait_seconds", "Time a window waited in the micro-batcher before dispatch.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+MODEL_READY = registry.gauge("stt_model_ready", "1 once the model is loaded and warmed up.")
+MODEL_LOAD_SECONDS = registry.gauge("stt_model_load_seconds", "Time spent loading the model weights.")
+MODEL_WARMUP_SECONDS = registry.gauge("stt_model_warmup_seconds", "Time spent on the warm-up decode.")
+COLD_START_SECONDS = registry.gauge("stt_cold_start_seconds", "Time from process start until the model is ready.")
+FIRST_REQUEST_SECONDS = registry.gauge("stt_first_request_seconds", "End-to-end latency of the first request served.")
+
+
+def seconds_since_start():
+    return time.perf_counter() - PROCESS_START_TIME
+
+
+def observe_request(seconds):
+    """Records a request's end-to-end latency; the first one is also kept as FIRST_REQUEST_SECONDS."""
+    STAGE_SECONDS.observe(seconds, stage="total")
+    if FIRST_REQUEST_SECONDS.value == 0:
+        FIRST_REQUEST_SECONDS.set(seconds)
+
+
+def observe_transcription(transcription_seconds, audio_seconds):
+    """Records the audio duration and the resulting real-time factor."""
+    AUDIO_DURATION_SECONDS.observe(audio_seconds)
+    if audio_seconds > 0:
+        REAL_TIME_FACTOR.observe(transcription_seconds / audio_seconds)
@@ -0,0 +1,118 @@
+import asyncio
+import itertools
+import logging
+from ipc import read_frame, encode_frame
+from metrics import MODEL_READY, COLD_START_SECONDS, seconds_since_start
+
+logger = logging.getLogger(__name__)
+
+
+class ModelHostError(Exception):
+    pass
+
+
+class ModelHostClient:
+    """
+    Drop-in replacement for InferenceExecutor that forwards decodes to the shared
+    model host over its Unix socket. Requests are multiplexed on one connection
+    and matched to their responses by id.
+    """
+
+    def __init__(self, socket_path, model_id, max_workers=4):
+        self.socket_path = socket_path
+        self.model_size = model_id
+        self.max_workers = max_workers
+        self.reader = None
+        self.writer = None
+        self.pending = {}
+        self.ids = itertools.count()
+        self.connect_lock = asyncio.Lock()
+        self.write_lock = asyncio.Lock()
+        self.reader_task = None
+        # Ready while connected; the host only binds its socket once its models are warm
+        self.ready = False
+        self.load_error = None
+        # Kept so the background connect is not garbage-collected while it runs
+        self.load_task = None
+
+    async def _ensure_connected(self):
+        async with self.connect_lock:
+            if self.writer is None or self.writer.is_closing():
+                self.reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+                self.reader_task = asyncio.create_task(self._read_responses())
+                if COLD_START_SECONDS.value == 0:
+                    COLD_START_SECONDS.set(seconds_since_start())
+                self.ready = True
+                MODEL_READY.set(1)
+
+    def start(self):
+        """Connects to the host in the background; call from the app's startup hook."""
+        self.load_task = asyncio.create_task(self._connect_until_ready())
+        self.load_task.add_done_callback(self._on_load_done)
+
+    def _on_load_done(self, task):
+        # Connect errors are retried; anything else ends the task and is reported on /ready
+        if not task.cancelled() and task.exception() is not None:
+            self.load_error = str(task.exception())
+            logger.error(f"Background load of model {self.model_size} failed: {task.exception()!r}")
+
+    async def _connect_until_ready(self, retry_interval=1.0):
+        while not self.ready:
+            try:
+                await self._ensure_connected()
+            except OSError:
+                await asyncio.sleep(retry_interval)
+
+    async def wait_ready(self):
+        await self._ensure_connected()
+
+    async def _read_responses(self):
+        try:
+            while True:
+                header, _ = await read_frame(self.reader)
+                future = self.pending.pop(header.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if header.get("ok"):
+                    future.set_result(header["result"])
+                else:
+                    future.set_exception(ModelHostError(header.get("error")))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.error(f"Lost connection to model host: {e!r}")
+        finally:
+            self.ready = False
+            MODEL_READY.set(0)
+            # Fail everything still waiting; the next request reconnects
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ModelHostError("Connection to model host lost"))
+            self.pending.clear()
+            self.writer.close()
+
+    async def _request(self, method, audio, params):
+        await self._ensure_connected()
+        # The reader may have exited since we connected; its cleanup already ran and would never fail
+        # a future registered now. The check and the registration run without yielding to the loop
+        if not self.ready:
+            raise ModelHostError("Connection to model host lost")
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        header = {"id": request_id, "model": self.model_size, "method": method, "params": params}
+        async with self.write_lock:
+            self.writer.write(encode_frame(header, audio.tobytes()))
+            # drain blocks while the host is applying backpressure
+            await self.writer.drain()
+        return await future
+
+    async def transcribe(self, audio, **params):
+        result = await self._request("transcribe", audio, params)
+        return result["segments"], result["info"]
+
+    async def transcribe_both(self, audio, **params):
+        result = await self._request("transcribe_both", audio, params)
+        return result["segments"], result["translated_segments"], result["language"]
+
+    def shutdown(self):
+        if self.writer is not None:
+            self.writer.close()
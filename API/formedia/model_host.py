@@ -0,0 +1,142 @@
+import os
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+import asyncio
+import logging
+import argparse
+import numpy as np
+from faster_whisper import decode_audio
+from inference import InferenceExecutor
+from batcher import DynamicBatcher
+from runtime_profile import load_profile
+from ipc import read_frame, encode_frame, DEFAULT_SOCKET_PATH
+
+# One process holds each Whisper model once and serves every HTTP front-end
+# (formedia, nimar, actus) over a local Unix socket; see ipc.py for the framing.
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    handlers=[
+                        logging.FileHandler("model_host.log"),
+                        logging.StreamHandler()
+                    ])
+logger = logging.getLogger(__name__)
+
+# Model id -> load settings; every front-end asks for one of these by id. Device,
+# precision and threading come from the host's tuned runtime profile
+MODEL_CONFIGS = {
+    "large-v2": {"batch_size": 8},
+}
+
+
+class ModelHost:
+    def __init__(self, model_ids, max_inflight_per_connection=8, cross_request_batching=False):
+        self.max_inflight_per_connection = max_inflight_per_connection
+        self.cross_request_batching = cross_request_batching
+        self.executors = {}
+        self.batchers = {}
+        for model_id in model_ids:
+            config = MODEL_CONFIGS[model_id]
+            profile = load_profile(model_id)
+            logger.info(f"Loading model {model_id}: {config}, {profile}")
+            self.executors[model_id] = InferenceExecutor(model_id, device=profile["device"],
+                                                         compute_type=profile["compute_type"],
+                                                         cpu_threads=profile["cpu_threads"],
+                                                         max_workers=profile["num_workers"], **config)
+            if cross_request_batching:
+                self.batchers[model_id] = DynamicBatcher(self.executors[model_id])
+
+    def start(self):
+        for batcher in self.batchers.values():
+            batcher.start()
+
+    async def stop(self):
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        for executor in self.executors.values():
+            executor.shutdown()
+
+    async def _run(self, header, payload):
+        model_id = header.get("model")
+        if model_id not in self.executors:
+            raise ValueError(f"Model {model_id} is not loaded on this host")
+        executor = self.executors[model_id]
+        if header.get("audio_path"):
+            audio = await asyncio.to_thread(decode_audio, header["audio_path"], sampling_rate=16000)
+        else:
+            audio = np.frombuffer(payload, dtype=np.float32)
+
+        params = header.get("params", {})
+        method = header.get("method")
+        if method == "transcribe":
+            if self.cross_request_batching:
+                segment_info, info = await self.batchers[model_id].transcribe(audio, **params)
+            else:
+                segment_info, info = await executor.transcribe(audio, **params)
+                info = {"language": info.language, "duration": info.duration}
+            return {"segments": segment_info, "info": info}
+        if method == "transcribe_both":
+            segment_info, translated_segments, language = await executor.transcribe_both(audio, **params)
+            return {"segments": segment_info, "translated_segments": translated_segments, "language": language}
+        raise ValueError(f"Unknown method {method}")
+
+    async def _handle_request(self, header, payload, writer, write_lock, inflight):
+        try:
+            result = await self._run(header, payload)
+            response = {"id": header.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            logger.error(f"Request {header.get('id')} failed: {str(e)}")
+            response = {"id": header.get("id"), "ok": False, "error": str(e)}
+        finally:
+            inflight.release()
+        async with write_lock:
+            writer.write(encode_frame(response))
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        # Backpressure: once a connection has max_inflight_per_connection requests running we
+        # stop reading from it, the socket buffer fills and the client's writes block
+        inflight = asyncio.Semaphore(self.max_inflight_per_connection)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await inflight.acquire()
+                try:
+                    header, payload = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    inflight.release()
+                    break
+                task = asyncio.create_task(self._handle_request(header, payload, writer, write_lock, inflight))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            writer.close()
+
+
+async def serve(socket_path, model_ids, max_inflight_per_connection, cross_request_batching=False):
+    host = ModelHost(model_ids, max_inflight_per_connection=max_inflight_per_connection,
+                     cross_request_batching=cross_request_batching)
+    host.start()
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(host.handle_connection, path=socket_path)
+    logger.info(f"Model host serving {model_ids} on {socket_path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await host.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared Whisper model host")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--models", nargs="+", default=list(MODEL_CONFIGS))
+    parser.add_argument("--max-inflight", type=int, default=8, help="Requests in flight per connection")
+    parser.add_argument("--cross-request-batching", action="store_true",
+                        help="Decode fixed 30 s windows from all clients in shared batches (see batcher.py for "
+                             "the quality trade-offs); by default each request runs WhisperModel.transcribe")
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket, args.models, args.max_inflight, args.cross_request_batching))
@@ -4,17 +4,42 @@ import shutil
 import logging
 import asyncio
 import time
-import aiofiles
 
-from fastapi import FastAPI, UploadFile, Depends, HTTPException, Header
-from faster_whisper import WhisperModel
+from fastapi import FastAPI, UploadFile, Depends, HTTPException, Header, Response
+from inference import InferenceExecutor
+from model_client import ModelHostClient
+from stub_model import StubExecutor
+from runtime_profile import load_profile
+from scratch import ScratchSpace
+from admission import AdmissionController
+from scheduler import ShortestJobFirstScheduler
 import torch
 import re  # To help with text cleanup
 from utils import *
+from fastapi.responses import JSONResponse, PlainTextResponse
+from metrics import registry, STAGE_SECONDS, REQUESTS, IN_FLIGHT_REQUESTS, IN_FLIGHT_INFERENCE, QUEUE_DEPTH, BACKLOG_AUDIO_SECONDS, COLD_START_SECONDS, observe_transcription, observe_request
 app = FastAPI()
 
 model_size = "large-v2"
-model = WhisperModel(model_size, device="cuda", compute_type="float16")
+# Device, precision, threading and beam size tuned for this host by runtime_profile.py
+runtime_profile = load_profile(model_size)
+# Speech pieces of one file decoded together; 1 disables batched decoding
+batch_size = 8
+# When set, decodes go to the shared model host (model_host.py) instead of a model loaded here
+model_host_socket = os.environ.get("STT_MODEL_HOST_SOCKET")
+# When set (to a real-time factor), a GPU-free stub replaces the model for load tests (load_test.py)
+stub_model_rtf = os.environ.get("STT_STUB_MODEL")
+if stub_model_rtf:
+    executor = StubExecutor(model_size, real_time_factor=float(stub_model_rtf), max_workers=4)
+elif model_host_socket:
+    executor = ModelHostClient(model_host_socket, model_size, max_workers=4)
+else:
+    # Decoding runs on the executor's worker pool instead of the event loop
+    executor = InferenceExecutor(model_size, device=runtime_profile["device"],
+                                 compute_type=runtime_profile["compute_type"],
+                                 cpu_threads=runtime_profile["cpu_threads"],
+                                 max_workers=runtime_profile["num_workers"], batch_size=batch_size,
+                                 load_in_background=True)
 
 # Configure logging to file
 logging.basicConfig(level=logging.INFO,
@@ -25,11 +50,8 @@ logging.basicConfig(level=logging.INFO,
                     ])
 logger = logging.getLogger(__name__)
 
-# Define a directory to store uploaded videos and audio
-upload_dir = "nimar_uploads"
-if os.path.exists(upload_dir):
-    shutil.rmtree(upload_dir)
-os.makedirs(upload_dir, exist_ok=True)
+# One unique scratch directory per request: tmpfs while uploads fit the RAM budget, ./nimar_uploads otherwise
+scratch = ScratchSpace("nimar_uploads", disk_root=".", tmpfs_budget_bytes=4 * 1024 ** 3, max_bytes=50 * 1024 ** 3)
 
 user_api_keys = {
     "user1": "apikey1",
@@ -37,81 +59,112 @@ user_api_keys = {
     # Add more users and their API keys as needed
 }
 
-# Semaphore to limit concurrent requests to 4
-semaphore = asyncio.Semaphore(4)
-
-async def process_video(file: UploadFile, news_type: str = None, language: str = None):
+# Requests are admitted by audio duration: at most 2 hours of audio waiting or in progress,
+# split fairly between API keys; the rest get 429 with a Retry-After from measured throughput
+admission = AdmissionController(max_backlog_seconds=2 * 3600, concurrency=executor.max_workers)
+BACKLOG_AUDIO_SECONDS.set_function(admission.backlog)
+
+# One processing slot per executor worker, handed out shortest audio first; waiting requests age by
+# 10 audio-seconds per second so long programmes still get a slot
+scheduler = ShortestJobFirstScheduler(executor.max_workers, throughput=admission.throughput, aging_rate=10.0)
+QUEUE_DEPTH.set_function(scheduler.depth)
+
+async def process_video(file: UploadFile, news_type: str = None, language: str = None, api_key: str = None,
+                        response: Response = None):
+    scratch_dir = None
+    ticket = None
+    slot = None
+    processing_seconds = None
     try:
-        original_file_name = file.filename
-        file_folder = os.path.join(upload_dir, original_file_name)
-        os.makedirs(file_folder, exist_ok=True)
-        file_path = os.path.join(file_folder, original_file_name)
-
-        # Asynchronously read and write the file
-        async with aiofiles.open(file_path, "wb") as temp_file:
-            file_content = await file.read()
-            await temp_file.write(file_content)
-
-        # Video extensions list
-        video_extensions = [".mp4", ".avi", ".mov", ".wmv", ".mkv", ".flv"]
+        original_file_name = os.path.basename(file.filename)
+        scratch_dir = scratch.allocate(getattr(file, "size", None))
+        file_path = os.path.join(scratch_dir.path, original_file_name)
+
+        # Stream the upload to scratch in chunks; peak memory stays at one chunk regardless of file size
+        with STAGE_SECONDS.time(stage="upload"):
+            file_size, content_hash = await save_upload_streaming(file, file_path)
+        scratch.resize(scratch_dir, file_size)
+
         # Log the file size after saving the file
-        file_size = get_file_size(file_path)
         readable_size = format_size(file_size)
-        logger.info(f"Uploaded file: {original_file_name}, Size: {readable_size}")
-
-        # Check if the file is a video
-        if any(file_path.lower().endswith(ext) for ext in video_extensions):
-            audio_file_path = os.path.join(file_folder, f"{original_file_name}.wav")
-            # Extract audio from video using FFmpeg (faster than moviepy)
-            await extract_audio_with_ffmpeg(file_path, audio_file_path)
-        else:
-            audio_file_path = file_path
+        logger.info(f"Uploaded file: {original_file_name}, Size: {readable_size}, SHA256: {content_hash}")
+
+        # Charge the request's audio duration against the backlog before it waits for a slot
+        with STAGE_SECONDS.time(stage="probe"):
+            duration = await probe_media_duration(file_path)
+        ticket = admission.admit(api_key, duration)
+
+        slot = scheduler.enqueue(duration)
+        if response is not None:
+            # Where the request stood when it was queued; the body is unchanged
+            response.headers["X-Queue-Position"] = str(scheduler.position(slot))
+            response.headers["X-Estimated-Start"] = f"{scheduler.estimated_start(slot):.3f}"
+        with STAGE_SECONDS.time(stage="queue_wait"):
+            await scheduler.wait(slot)
+        processing_start = time.perf_counter()
+
+        # Decode audio or video straight to 16 kHz mono float32; later stages reuse this buffer
+        with STAGE_SECONDS.time(stage="ffmpeg"):
+            audio = await decode_audio_with_ffmpeg(file_path)
 
         # Transcription logic
         transcribe_params = {
             "no_repeat_ngram_size": 2,
-            "beam_size": 5,
+            "beam_size": runtime_profile["beam_size"],
             "condition_on_previous_text": False,
             "language": language,
         }
 
-        if news_type == "live":
-            segments, info = model.transcribe(audio_file_path, **transcribe_params)
-            if language == "ur":
-                segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
-                full_text_urdu = ''.join([segment["text"] for segment in segment_info])
-                # Remove Hindi text if present in Urdu transcription
-                full_text_urdu = remove_hindi_text(full_text_urdu)
-                full_text_english = ""
+        transcription_start = time.perf_counter()
+        with IN_FLIGHT_INFERENCE.track_inprogress():
+            if news_type == "live":
+                segment_info, info = await executor.transcribe(audio, **transcribe_params)
+                if language == "ur":
+                    full_text_urdu = ''.join([segment["text"] for segment in segment_info])
+                    # Remove Hindi text if present in Urdu transcription
+                    full_text_urdu = remove_hindi_text(full_text_urdu)
+                    full_text_english = ""
+                else:
+                    full_text_urdu = ""
+                    full_text_english = ''.join([segment["text"] for segment in segment_info])
             else:
-                full_text_urdu = ""
-                segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
+                transcribe_params_report = transcribe_params.copy()
+                transcribe_params_report["task"] = "translate"
+                segment_info, info = await executor.transcribe(audio, **transcribe_params_report)
                 full_text_english = ''.join([segment["text"] for segment in segment_info])
-        else:
-            transcribe_params_report = transcribe_params.copy()
-            transcribe_params_report["task"] = "translate"
-            segments, info = model.transcribe(audio_file_path, **transcribe_params_report)
-            segment_info = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
-            full_text_english = ''.join([segment["text"] for segment in segment_info])
-            full_text_urdu = ""
+                full_text_urdu = ""
+        transcription_time = time.perf_counter() - transcription_start
+        STAGE_SECONDS.observe(transcription_time, stage="transcription")
+        observe_transcription(transcription_time, len(audio) / SAMPLE_RATE)
 
         # Merge segments into larger chunks (if needed)
-        merged_segments = merge_segments(segment_info, max_length=3)
-
-        # Clean up files
-        shutil.rmtree(file_folder, ignore_errors=True)
+        with STAGE_SECONDS.time(stage="merging"):
+            merged_segments = merge_segments(segment_info, max_length=3)
 
         # Clear PyTorch GPU cache to free up memory (model remains loaded)
         torch.cuda.empty_cache()
 
+        REQUESTS.inc(outcome="ok")
+        processing_seconds = time.perf_counter() - processing_start
         return {"urdu_full_text": full_text_urdu, "english_full_text": full_text_english, "Timestamp": merged_segments}
 
     except HTTPException as e:
         logger.error(f"HTTPException: {e.detail}")
+        REQUESTS.inc(outcome="rejected" if e.status_code == 429 else "error")
         raise e
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
+        REQUESTS.inc(outcome="error")
         return {"error": f"Internal Error {str(e)}"}
+    finally:
+        if slot is not None:
+            scheduler.release(slot)
+        if ticket is not None:
+            admission.release(ticket, processing_seconds)
+        # Files are removed in the background
+        if scratch_dir is not None:
+            with STAGE_SECONDS.time(stage="cleanup"):
+                scratch.release(scratch_dir)
 
 async def get_api_key(api_key: str = Header(None, convert_underscores=False)):
     if api_key not in user_api_keys.values():
@@ -141,30 +194,58 @@ async def transcribe_video_endpoint(
     video_file: UploadFile,
     api_key: str = Depends(get_api_key),
     news_type: str = Depends(get_news_type),
-    language: str = Depends(get_language_key)
+    language: str = Depends(get_language_key),
+    response: Response = None
 ):
-    async with semaphore:
+    with IN_FLIGHT_REQUESTS.track_inprogress():
         logger.info(f"Received request for transcribe_video with file: {video_file.filename}")
-        
+
         start_time = time.time()  # Record the start time
-        
-        result = await process_video(video_file, news_type, language)
-        
+
+        # Admission and the wait for a slot happen inside, once the upload's duration is known
+        result = await process_video(video_file, news_type, language, api_key, response)
+
         end_time = time.time()  # Record the end time
         time_taken = end_time - start_time  # Calculate the time difference
-        
+        observe_request(time_taken)
+
         # Log the time taken for the request along with the filename
         logger.info(f"Processed file: {video_file.filename} in {time_taken:.2f} seconds")
-        
+
         return result
 
 
+@app.on_event("startup")
+async def load_model():
+    # Returns immediately; the model loads and warms up in the background
+    executor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    executor.shutdown()
+    await scratch.drain()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/live")
 async def live_check():
     logger.info("Live status endpoint accessed")
     return {"live": True}
 
 
+@app.get("/ready")
+async def ready_check():
+    # Unlike /live, only reports ready once the model is loaded and warmed up
+    if not executor.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "error": executor.load_error})
+    return {"ready": True, "model": model_size, "cold_start_seconds": COLD_START_SECONDS.value}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=2001)
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import socket
+import logging
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import ctranslate2
+from faster_whisper import WhisperModel, decode_audio
+
+logger = logging.getLogger(__name__)
+
+# Where tuned profiles live; one JSON file per host, keyed by model size
+PROFILE_DIR = os.environ.get("STT_PROFILE_DIR", "runtime_profiles")
+
+# Used when this host has not been tuned yet
+DEFAULT_PROFILES = {
+    "cuda": {"device": "cuda", "compute_type": "float16", "cpu_threads": 0, "num_workers": 4, "beam_size": 5},
+    "cpu": {"device": "cpu", "compute_type": "int8", "cpu_threads": 0, "num_workers": 1, "beam_size": 5},
+}
+
+
+def detect_device():
+    return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+
+def candidate_profiles(device):
+    """
+    Settings to try on this host. The first candidate is the most accurate one
+    and serves as the reference when no reference transcript is given.
+    """
+    supported = ctranslate2.get_supported_compute_types(device)
+    if device == "cuda":
+        compute_types = [c for c in ("float16", "int8_float16", "int8") if c in supported]
+        cpu_threads = [0]
+        num_workers = [1, 2, 4]
+    else:
+        compute_types = [c for c in ("float32", "int8") if c in supported]
+        cores = os.cpu_count() or 1
+        cpu_threads = sorted({cores, max(cores // 2, 1), max(cores // 4, 1)}, reverse=True)
+        num_workers = [1, 2]
+
+    candidates = []
+    for beam_size, compute_type, threads, workers in itertools.product([5, 1], compute_types, cpu_threads, num_workers):
+        # Intra-op threads are shared between workers, so skip oversubscribed combinations
+        if device == "cpu" and threads * workers > (os.cpu_count() or 1):
+            continue
+        candidates.append({"device": device, "compute_type": compute_type, "cpu_threads": threads,
+                           "num_workers": workers, "beam_size": beam_size})
+    return candidates
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def benchmark_profile(model_size, profile, audio, sampling_rate=16000):
+    """
+    Loads the model with a profile and decodes the clip num_workers times in parallel.
+
+    Returns:
+    - dict with the transcript, wall time and throughput (audio seconds decoded
+      per wall-clock second across all workers).
+    """
+    model = WhisperModel(model_size, device=profile["device"], compute_type=profile["compute_type"],
+                         cpu_threads=profile["cpu_threads"], num_workers=profile["num_workers"])
+
+    def decode():
+        segments, _ = model.transcribe(audio, beam_size=profile["beam_size"], condition_on_previous_text=False)
+        return "".join(segment.text for segment in segments)
+
+    # Warm-up run so CUDA context creation and allocator growth are not timed
+    decode()
+    workers = profile["num_workers"]
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(lambda _: decode(), range(workers)))
+    wall_time = time.perf_counter() - start_time
+    del model
+    audio_seconds = len(audio) / sampling_rate
+    return {"text": texts[0], "wall_time": wall_time, "throughput": workers * audio_seconds / wall_time}
+
+
+def tune_profile(model_size, audio, reference_text=None, wer_tolerance=0.02, device=None):
+    """
+    Benchmarks every candidate profile and picks the one with the highest
+    throughput whose WER against the reference stays within wer_tolerance.
+
+    Parameters:
+    - audio: 16 kHz mono float32 reference clip.
+    - reference_text: Ground-truth transcript; defaults to the output of the
+      most accurate candidate.
+    - wer_tolerance: Allowed absolute WER increase over the lowest WER measured.
+
+    Returns:
+    - (profile, results): The chosen profile and every candidate's measurements.
+    """
+    device = device or detect_device()
+    results = []
+    for profile in candidate_profiles(device):
+        try:
+            measurement = benchmark_profile(model_size, profile, audio)
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f"Skipping profile {profile}: {str(e)}")
+            continue
+        if reference_text is None:
+            reference_text = measurement["text"]
+        measurement["wer"] = word_error_rate(reference_text, measurement["text"])
+        logger.info(f"{profile}: {measurement['throughput']:.2f}x realtime, WER {measurement['wer']:.3f}")
+        results.append({"profile": profile, **measurement})
+
+    if not results:
+        raise RuntimeError(f"No profile for {model_size} could be benchmarked on {device}")
+    # Measured against the most accurate candidate, which need not be the first one to benchmark successfully
+    best_wer = min(r["wer"] for r in results)
+    accepted = [r for r in results if r["wer"] <= best_wer + wer_tolerance]
+    best = max(accepted, key=lambda r: r["throughput"])
+    return best["profile"], results
+
+
+def _profile_path(profile_dir):
+    return os.path.join(profile_dir, f"{socket.gethostname()}.json")
+
+
+def save_profile(model_size, profile, profile_dir=PROFILE_DIR):
+    os.makedirs(profile_dir, exist_ok=True)
+    path = _profile_path(profile_dir)
+    profiles = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            profiles = json.load(f)
+    profiles[model_size] = profile
+    with open(path, "w") as f:
+        json.dump(profiles, f, indent=2)
+    return path
+
+
+def load_profile(model_size, profile_dir=PROFILE_DIR):
+    """
+    Returns the tuned profile for this host and model, or the default profile
+    for the detected device when the host has not been tuned.
+    """
+    path = _profile_path(profile_dir)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            profile = json.load(f).get(model_size)
+        if profile is not None:
+            logger.info(f"Using tuned runtime profile for {model_size}: {profile}")
+            return profile
+    profile = dict(DEFAULT_PROFILES[detect_device()])
+    logger.info(f"No tuned runtime profile for {model_size} in {path}; using defaults {profile}")
+    return profile
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Benchmark WhisperModel settings on this host and store the fastest")
+    parser.add_argument("--model", default="large-v2")
+    parser.add_argument("--clip", required=True, help="Reference audio or video clip")
+    parser.add_argument("--reference", help="Text file with the clip's ground-truth transcript")
+    parser.add_argument("--wer-tolerance", type=float, default=0.02)
+    parser.add_argument("--device", choices=["cuda", "cpu"])
+    parser.add_argument("--profile-dir", default=PROFILE_DIR)
+    args = parser.parse_args()
+
+    reference_text = None
+    if args.reference:
+        with open(args.reference, "r", encoding="utf-8") as f:
+            reference_text = f.read()
+    profile, results = tune_profile(args.model, decode_audio(args.clip, sampling_rate=16000), reference_text,
+                                    args.wer_tolerance, args.device)
+    for result in sorted(results, key=lambda r: -r["throughput"]):
+        print(f"{result['throughput']:8.2f}x  WER {result['wer']:.3f}  {result['profile']}")
+    print(f"Selected {profile}; saved to {save_profile(args.model, profile, args.profile_dir)}")
@@ -0,0 +1,115 @@
+import time
+import asyncio
+import itertools
+
+
+class SchedulerEntry:
+    def __init__(self, duration, priority, seq, future):
+        self.duration = duration
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.time()
+        self.started_at = None
+
+
+class ShortestJobFirstScheduler:
+    """
+    Hands a fixed number of slots to waiting work, shortest audio first.
+
+    Waiting entries are ordered by (priority, effective duration, arrival). The
+    effective duration is the probed audio duration minus aging_rate seconds
+    for every second waited, so an hour-long programme overtakes a steady
+    stream of short clips after a bounded wait. Entries with no known duration
+    count as unknown_duration.
+    """
+
+    def __init__(self, slots, throughput, aging_rate=10.0, unknown_duration=600.0):
+        self.slots = slots
+        self.free_slots = slots
+        # Callable returning audio seconds processed per wall-clock second with every slot busy
+        self.throughput = throughput
+        self.aging_rate = aging_rate
+        self.unknown_duration = unknown_duration
+        self.waiting = []
+        self.running = set()
+        self.counter = itertools.count()
+
+    def _sort_key(self, entry, now):
+        return entry.priority, entry.duration - self.aging_rate * (now - entry.enqueued_at), entry.seq
+
+    def _order(self):
+        now = time.time()
+        return sorted(self.waiting, key=lambda entry: self._sort_key(entry, now))
+
+    def _dispatch(self):
+        now = time.time()
+        while self.free_slots > 0 and self.waiting:
+            entry = min(self.waiting, key=lambda e: self._sort_key(e, now))
+            self.waiting.remove(entry)
+            self.free_slots -= 1
+            entry.started_at = now
+            self.running.add(entry)
+            entry.future.set_result(None)
+
+    def enqueue(self, duration=None, priority=0):
+        """Registers work and returns its entry; await wait(entry) for the slot."""
+        future = asyncio.get_running_loop().create_future()
+        duration = duration if duration is not None else self.unknown_duration
+        entry = SchedulerEntry(duration, priority, next(self.counter), future)
+        self.waiting.append(entry)
+        self._dispatch()
+        return entry
+
+    async def wait(self, entry):
+        try:
+            await entry.future
+        except asyncio.CancelledError:
+            if entry in self.waiting:
+                self.waiting.remove(entry)
+            elif entry in self.running:
+                # The slot was granted just as the waiter went away
+                self.release(entry)
+            raise
+
+    async def acquire(self, duration=None, priority=0):
+        entry = self.enqueue(duration, priority)
+        await self.wait(entry)
+        return entry
+
+    def release(self, entry):
+        if entry in self.running:
+            self.running.discard(entry)
+            self.free_slots += 1
+        self._dispatch()
+
+    def depth(self):
+        return len(self.waiting)
+
+    def position(self, entry):
+        """1-based place among waiting entries, or 0 once the entry has a slot."""
+        if entry not in self.waiting:
+            return 0
+        return self._order().index(entry) + 1
+
+    def estimated_start(self, entry):
+        """
+        Unix time the entry is expected to get a slot: the audio still to be
+        processed ahead of it (remaining work of running entries plus every
+        waiting entry ordered before it) divided by the measured throughput.
+        """
+        if entry.started_at is not None:
+            return entry.started_at
+        now = time.time()
+        throughput = self.throughput()
+        per_slot = throughput / self.slots
+        work_ahead = sum(max(running.duration - (now - running.started_at) * per_slot, 0.0)
+                         for running in self.running)
+        # A free slot means nothing is in the way
+        if self.free_slots > 0:
+            work_ahead = 0.0
+        for waiting in self._order():
+            if waiting is entry:
+                break
+            work_ahead += waiting.duration
+        return now + work_ahead / throughput
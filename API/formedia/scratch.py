@@ -0,0 +1,116 @@
+import os
+import shutil
+import asyncio
+import logging
+import tempfile
+import threading
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+TMPFS_ROOT = "/dev/shm"
+
+
+class ScratchDir:
+    def __init__(self, path, on_tmpfs, reserved_bytes):
+        self.path = path
+        self.on_tmpfs = on_tmpfs
+        self.reserved_bytes = reserved_bytes
+
+    def __fspath__(self):
+        return self.path
+
+
+class ScratchSpace:
+    """
+    Hands out one uniquely named scratch directory per request.
+
+    Directories go on tmpfs (/dev/shm) while the request's expected size fits
+    the tmpfs budget and the free RAM, and on disk otherwise. All directories
+    together stay under max_bytes; a request that would exceed it is refused
+    with 507. Directories are removed by a background task after release(), so
+    deleting files never sits on the request path.
+    """
+
+    def __init__(self, name, disk_root, tmpfs_root=TMPFS_ROOT, tmpfs_budget_bytes=2 * 1024 ** 3,
+                 max_bytes=20 * 1024 ** 3, tmpfs_min_free_bytes=1024 ** 3):
+        self.disk_dir = os.path.join(disk_root, name)
+        self.tmpfs_dir = os.path.join(tmpfs_root, name) if os.path.isdir(tmpfs_root) else None
+        self.tmpfs_budget_bytes = tmpfs_budget_bytes
+        self.max_bytes = max_bytes
+        self.tmpfs_min_free_bytes = tmpfs_min_free_bytes
+        self.tmpfs_bytes = 0
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.cleanup_tasks = set()
+        self.stats = {"tmpfs_allocations": 0, "disk_allocations": 0, "rejections": 0}
+
+        # Leftovers from a previous run are removed once, at startup
+        for directory in (self.disk_dir, self.tmpfs_dir):
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory, exist_ok=True)
+
+    def _fits_tmpfs(self, expected_bytes):
+        if self.tmpfs_dir is None or expected_bytes is None:
+            return False
+        if self.tmpfs_bytes + expected_bytes > self.tmpfs_budget_bytes:
+            return False
+        return shutil.disk_usage(self.tmpfs_dir).free - expected_bytes >= self.tmpfs_min_free_bytes
+
+    def allocate(self, expected_bytes=None):
+        """
+        Creates a scratch directory for one request.
+
+        Parameters:
+        - expected_bytes: Upper estimate of what the request will write (usually the
+          upload size). Unknown sizes go to disk.
+
+        Returns:
+        - ScratchDir; pass it to release() when the request is done.
+        """
+        reserved = expected_bytes or 0
+        with self.lock:
+            if self.total_bytes + reserved > self.max_bytes:
+                self.stats["rejections"] += 1
+                raise HTTPException(status_code=507, detail="Scratch space exhausted, retry later")
+            on_tmpfs = self._fits_tmpfs(expected_bytes)
+            if on_tmpfs:
+                self.tmpfs_bytes += reserved
+                self.stats["tmpfs_allocations"] += 1
+            else:
+                self.stats["disk_allocations"] += 1
+            self.total_bytes += reserved
+        path = tempfile.mkdtemp(dir=self.tmpfs_dir if on_tmpfs else self.disk_dir)
+        return ScratchDir(path, on_tmpfs, reserved)
+
+    def resize(self, scratch_dir, actual_bytes):
+        """Replaces the reservation with the bytes the request actually wrote."""
+        with self.lock:
+            delta = actual_bytes - scratch_dir.reserved_bytes
+            self.total_bytes += delta
+            if scratch_dir.on_tmpfs:
+                self.tmpfs_bytes += delta
+            scratch_dir.reserved_bytes = actual_bytes
+
+    def _remove(self, scratch_dir):
+        shutil.rmtree(scratch_dir.path, ignore_errors=True)
+        with self.lock:
+            self.total_bytes -= scratch_dir.reserved_bytes
+            if scratch_dir.on_tmpfs:
+                self.tmpfs_bytes -= scratch_dir.reserved_bytes
+
+    def release(self, scratch_dir):
+        """Schedules removal of the directory and returns immediately."""
+        task = asyncio.create_task(asyncio.to_thread(self._remove, scratch_dir))
+        self.cleanup_tasks.add(task)
+        task.add_done_callback(self.cleanup_tasks.discard)
+
+    async def drain(self):
+        """Waits for pending removals; call from the app's shutdown hook."""
+        if self.cleanup_tasks:
+            await asyncio.gather(*self.cleanup_tasks, return_exceptions=True)
+
+    def get_stats(self):
+        return {**self.stats, "tmpfs_bytes": self.tmpfs_bytes, "total_bytes": self.total_bytes,
+                "pending_cleanups": len(self.cleanup_tasks)}
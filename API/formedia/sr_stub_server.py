@@ -0,0 +1,67 @@
+import asyncio
+import argparse
+import time
+import numpy as np
+from typing import List
+from fastapi import FastAPI, UploadFile, File
+from SR import SpeakerRecognitionClient
+from utils import encode_wav, SAMPLE_RATE
+
+# Stand-in for the Speaker_Recognition service so SR client throughput can be measured locally
+app = FastAPI()
+
+# Simulated per-request latency (seconds) of the real SR model
+SR_LATENCY = 0.2
+
+
+@app.post("/Speaker_Recognition/")
+async def speaker_recognition_stub(video_file: UploadFile):
+    await video_file.read()
+    await asyncio.sleep(SR_LATENCY)
+    return [{"person": "Stub Speaker"}]
+
+
+@app.post("/Speaker_Recognition_batch/")
+async def speaker_recognition_batch_stub(video_files: List[UploadFile] = File(...)):
+    for video_file in video_files:
+        await video_file.read()
+    await asyncio.sleep(SR_LATENCY)
+    return [[{"person": "Stub Speaker"}] for _ in video_files]
+
+
+async def measure_throughput(api_url, num_clips, clip_seconds, max_concurrency, batch_size):
+    """
+    Sends num_clips synthetic clips through SpeakerRecognitionClient and prints clips per second.
+    """
+    clips = [np.zeros(int(clip_seconds * SAMPLE_RATE), dtype=np.float32)] * num_clips
+    client = SpeakerRecognitionClient(api_url=api_url, max_concurrency=max_concurrency, batch_size=batch_size)
+    try:
+        start_time = time.time()
+        names = await client.recognize_many(clips, encode=encode_wav)
+        time_taken = time.time() - start_time
+    finally:
+        await client.aclose()
+    failed = sum(name is None for name in names)
+    print(f"concurrency={max_concurrency} batch_size={batch_size}: {num_clips} clips in {time_taken:.2f}s "
+          f"({num_clips / time_taken:.1f} clips/s, {failed} failed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Speaker_Recognition server and SR client benchmark")
+    parser.add_argument("--serve", action="store_true", help="Run the stub server")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=SR_LATENCY)
+    parser.add_argument("--clips", type=int, default=400)
+    parser.add_argument("--clip-seconds", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        SR_LATENCY = args.latency
+        uvicorn.run(app, host="127.0.0.1", port=args.port)
+    else:
+        # Run against a stub started with --serve
+        asyncio.run(measure_throughput(f"http://127.0.0.1:{args.port}", args.clips, args.clip_seconds,
+                                       args.concurrency, args.batch_size))
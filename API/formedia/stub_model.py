@@ -0,0 +1,126 @@
+import time
+import asyncio
+import logging
+import functools
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from metrics import MODEL_READY, COLD_START_SECONDS, seconds_since_start
+
+logger = logging.getLogger(__name__)
+
+# Stand-in for InferenceExecutor so scheduling and I/O changes can be load-tested without a GPU.
+# Enabled in formedia and nimar with STT_STUB_MODEL=<real-time factor>, e.g. STT_STUB_MODEL=0.05.
+
+SAMPLE_RATE = 16000
+# One fake segment per this many seconds of audio
+SEGMENT_SECONDS = 5.0
+
+
+class StubExecutor:
+    """
+    Mimics InferenceExecutor's interface. Each decode holds a worker thread for
+    real_time_factor * audio duration, like a real decode holds a model worker,
+    and returns one placeholder segment per SEGMENT_SECONDS of audio.
+    """
+
+    def __init__(self, model_size, real_time_factor=0.05, max_workers=4, load_seconds=0.0):
+        self.model_size = model_size
+        self.real_time_factor = real_time_factor
+        self.max_workers = max_workers
+        self.load_seconds = load_seconds
+        self.warmup_seconds = 0.0
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stub-whisper")
+        self.ready = False
+        self.ready_event = None
+        self.load_error = None
+        self.load_task = None
+
+    def load(self):
+        time.sleep(self.load_seconds)
+        self.ready = True
+        MODEL_READY.set(1)
+        COLD_START_SECONDS.set(seconds_since_start())
+
+    def start(self):
+        self.ready_event = asyncio.Event()
+        self.load_task = asyncio.create_task(self._load_in_background())
+        self.load_task.add_done_callback(self._on_load_done)
+
+    def _on_load_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.load_error = str(task.exception())
+            logger.error(f"Background load of model {self.model_size} failed: {task.exception()!r}")
+
+    async def _load_in_background(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.pool, self.load)
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"Loading stub model {self.model_size} failed: {str(e)}")
+        finally:
+            self.ready_event.set()
+
+    async def wait_ready(self):
+        if not self.ready:
+            await self.ready_event.wait()
+        if self.load_error is not None:
+            raise RuntimeError(f"Model {self.model_size} failed to load: {self.load_error}")
+
+    def _segments(self, audio):
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + SEGMENT_SECONDS, duration)
+            segments.append({"start": start, "end": end, "text": f" stub segment {len(segments)}"})
+            start = end
+        return segments, duration
+
+    def _run_transcribe(self, audio, params):
+        segments, duration = self._segments(audio)
+        time.sleep(duration * self.real_time_factor)
+        return segments, SimpleNamespace(language=params.get("language") or "en", duration=duration)
+
+    async def transcribe(self, audio, **params):
+        await self.wait_ready()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(self._run_transcribe, audio, params))
+
+    async def transcribe_both(self, audio, **params):
+        segment_info, info = await self.transcribe(audio, **params)
+        return segment_info, [dict(segment) for segment in segment_info], info.language
+
+    def _run_transcribe_stream(self, audio, params, loop, queue, stop):
+        segments, duration = self._segments(audio)
+        loop.call_soon_threadsafe(queue.put_nowait, ("info", SimpleNamespace(
+            language=params.get("language") or "en", duration=duration)))
+        for segment in segments:
+            if stop.is_set():
+                break
+            time.sleep((segment["end"] - segment["start"]) * self.real_time_factor)
+            loop.call_soon_threadsafe(queue.put_nowait, ("segment", segment))
+        loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+
+    async def transcribe_stream(self, audio, **params):
+        await self.wait_ready()
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        loop.run_in_executor(self.pool, self._run_transcribe_stream, audio, params, loop, queue, stop)
+        _, info = await queue.get()
+
+        async def segments():
+            try:
+                while True:
+                    kind, value = await queue.get()
+                    if kind != "segment":
+                        return
+                    yield value
+            finally:
+                stop.set()
+
+        return segments(), info
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,37 @@
+import numpy as np
+from diarization import cluster_speakers
+from utils import SAMPLE_RATE
+
+# (pitch in Hz, formants as (centre Hz, bandwidth Hz, gain))
+VOICE_A = (110, [(700, 120, 1.0), (1200, 150, 0.6), (2600, 200, 0.3)])
+VOICE_B = (210, [(500, 100, 1.0), (1800, 150, 0.7), (3000, 200, 0.4)])
+
+
+def synthetic_voice(pitch, formants, seconds, rng, noise):
+    """Harmonics of a slightly wavering pitch shaped by formant resonances, at a random level, plus noise."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    frequency = pitch * (1 + 0.03 * np.sin(2 * np.pi * rng.uniform(0.5, 2) * t))
+    phase = 2 * np.pi * np.cumsum(frequency) / SAMPLE_RATE
+    samples = np.zeros_like(t)
+    for k in range(1, int(7000 / pitch)):
+        gain = sum(g / (1 + ((k * pitch - centre) / bandwidth) ** 2) for centre, bandwidth, g in formants) + 0.01
+        samples += gain * np.sin(k * phase + rng.uniform(0, 2 * np.pi))
+    samples *= rng.uniform(0.3, 1.0) / np.abs(samples).max()
+    return (samples + rng.normal(0, noise, len(t))).astype(np.float32)
+
+
+def test_one_speaker_collapses_to_a_single_cluster():
+    rng = np.random.default_rng(0)
+    clips = [synthetic_voice(*VOICE_A, rng.uniform(1, 4), rng, noise=rng.uniform(0.001, 0.05)) for _ in range(30)]
+    labels, representatives = cluster_speakers(clips)
+    assert set(labels) == {0}
+    assert len(representatives) == 1
+
+
+def test_two_speakers_are_kept_apart():
+    rng = np.random.default_rng(1)
+    voices = [VOICE_A, VOICE_B] * 10
+    clips = [synthetic_voice(*voice, rng.uniform(1, 4), rng, noise=0.01) for voice in voices]
+    labels, representatives = cluster_speakers(clips)
+    assert labels == [0, 1] * 10
+    assert [labels[i] for i in representatives] == [0, 1]
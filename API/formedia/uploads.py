@@ -0,0 +1,30 @@
+import hashlib
+import aiofiles
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+async def save_upload_streaming(upload_file, destination_path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Stream an upload to disk in fixed-size chunks instead of reading it whole into memory.
+    The content hash and size are computed on the fly.
+
+    Parameters:
+        upload_file (UploadFile): The incoming upload.
+        destination_path (str): Where to spool the upload.
+        chunk_size (int): Bytes read per iteration; bounds the memory held per request.
+
+    Returns:
+        tuple: (size in bytes, sha256 hex digest of the content)
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(destination_path, "wb") as out_file:
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            size += len(chunk)
+            await out_file.write(chunk)
+    return size, sha256.hexdigest()
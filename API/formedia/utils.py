@@ -1,11 +1,16 @@
 import re
-import subprocess 
+import asyncio
 import os
-from pydub import AudioSegment
+import io
+import wave
+import numpy as np
 import unicodedata
 import uuid
 import logging
 from fastapi import HTTPException
+# Also used by the finetune-whisper service
+from uploads import UPLOAD_CHUNK_SIZE, save_upload_streaming
+from ffmpeg_decode import SAMPLE_RATE, decode_audio_with_ffmpeg
 # Configure logging to file
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -29,6 +34,7 @@ def format_size(size_in_bytes):
         if size_in_bytes < 1024:
             return f"{size_in_bytes:.2f} {unit}"
         size_in_bytes /= 1024
+
 def remove_hindi_text(input_string):
     # Normalize the input string to handle any combined Unicode characters
     normalized_string = unicodedata.normalize('NFC', input_string)
@@ -79,44 +85,84 @@ def merge_segments(segment_info, max_length=3):
 
     return merged_segments
 
-async def extract_audio_with_ffmpeg(video_file_path, audio_file_path):
-    try:
-        command = [
-            'ffmpeg', '-i', video_file_path, '-vn', 
-            '-acodec', 'pcm_s16le', '-ar', '44100', '-ac', '2', 
-            audio_file_path, '-loglevel', 'quiet'
-        ]
-        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Check if the audio file was created and is not empty
-        if not os.path.exists(audio_file_path) or os.path.getsize(audio_file_path) == 0:
-            raise HTTPException(status_code=404, detail="No audio found in the provided video.")
 
-        return audio_file_path
-    except subprocess.CalledProcessError:
-        raise HTTPException(status_code=500, detail="Failed to extract audio from video.")
+def align_segments(reference_segments, segments):
+    """
+    Maps segments from a second decode of the same audio onto reference segments by time.
 
+    Each segment's text goes to the reference segment it overlaps most; one that
+    overlaps none goes to the nearest. The result has the reference segments'
+    start and end, so it lines up one-to-one with them.
 
+    Parameters:
+    - reference_segments: List of dictionaries containing 'start', 'end', and 'text'.
+    - segments: List of dictionaries containing 'start', 'end', and 'text'.
 
-def extract_audio_clip(audio_file, start_time, end_time, output_file):
+    Returns:
+    - aligned_segments: One segment per reference segment, with the texts mapped onto it.
     """
-    Extracts a segment from an audio file and saves it as a new file.
-    
-    :param audio_file: Path to the main audio file.
+    texts = [[] for _ in reference_segments]
+    for segment in segments:
+        if not reference_segments:
+            break
+        # Negative for disjoint segments, so the closest one wins when nothing overlaps
+        overlaps = [min(segment["end"], reference["end"]) - max(segment["start"], reference["start"])
+                    for reference in reference_segments]
+        texts[overlaps.index(max(overlaps))].append(segment["text"].strip())
+
+    return [{"start": reference["start"], "end": reference["end"], "text": " ".join(text)}
+            for reference, text in zip(reference_segments, texts)]
+
+
+def slice_audio(audio, start_time, end_time, sampling_rate=SAMPLE_RATE):
+    """
+    Cuts a segment out of a decoded audio buffer without copying it.
+
+    :param audio: 1-D numpy array holding the decoded mono audio.
     :param start_time: Start time in seconds (float or int).
     :param end_time: End time in seconds (float or int).
-    :param output_file: Output file path for the extracted clip.
+    :param sampling_rate: Sampling rate of the buffer.
+    :return: A numpy view over the requested samples.
     """
-    # Load the main audio file
-    audio = AudioSegment.from_file(audio_file)
-    
-    # Convert start and end times to milliseconds
-    start_ms = start_time * 1000
-    end_ms = end_time * 1000
+    start_sample = max(int(start_time * sampling_rate), 0)
+    end_sample = min(int(end_time * sampling_rate), len(audio))
+    return audio[start_sample:end_sample]
+
 
-    # Extract the desired audio segment
-    clip = audio[start_ms:end_ms]
+def encode_wav(samples, sampling_rate=SAMPLE_RATE):
+    """
+    Encodes float32 mono samples as an in-memory 16-bit PCM WAV.
+
+    :param samples: 1-D numpy array of float32 samples in [-1, 1].
+    :param sampling_rate: Sampling rate of the samples.
+    :return: WAV file contents as bytes.
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sampling_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
 
-    # Save the extracted clip to the specified output file
-    clip.export(output_file, format="wav")
-    print(f"Clip saved: {output_file}")
\ No newline at end of file
+
+async def probe_media_duration(file_path):
+    """
+    Reads the container duration with ffprobe without decoding the media.
+
+    :param file_path: Path to the uploaded audio or video file.
+    :return: Duration in seconds, or None when ffprobe cannot tell.
+    """
+    command = [
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', file_path
+    ]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    stdout, _ = await process.communicate()
+    try:
+        return float(stdout.decode().strip())
+    except ValueError:
+        logger.warning(f"ffprobe could not read the duration of {file_path}")
+        return None
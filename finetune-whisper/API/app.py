@@ -1,18 +1,34 @@
 import os
+import sys
 import shutil
 import logging
 import time
-import torch
-import aiofiles
 import asyncio
+import numpy as np
 from fastapi import FastAPI, UploadFile, Depends, HTTPException, Header
-from utils import convert_audio_to_16000, get_file_size, format_size, get_file_duration
-from chunking import extract_audio_from_video, split_audio_into_chunks
-from inference import transcribe_audio
-from english_inference import transcribe_english_audio
+from fastapi.responses import JSONResponse
+from utils import format_size, get_file_duration
+from chunking import decode_audio_with_ffmpeg, iter_speech_windows
+from inference import transcribe_chunks, transcribe_arrays, model_id as urdu_model_id
+from english_inference import transcribe_english_chunks, transcribe_english_audio, model_id as english_model_id
+from stitching import TranscriptStitcher
+# Scratch space and upload streaming are shared with the formedia service; appended so this directory's
+# modules take precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "API", "formedia"))
+from scratch import ScratchSpace
+from uploads import save_upload_streaming
+from model_manager import models
 
 app = FastAPI()
 
+# Reference point for cold-start time; this module is imported while the app starts
+process_start_time = time.perf_counter()
+# Set by warm_up_models(), which runs in the background after startup
+ready = False
+load_error = None
+startup_timings = {}
+warmup_task = None
+
 # Configure logging to file
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -22,11 +38,9 @@ logging.basicConfig(level=logging.INFO,
                     ])
 logger = logging.getLogger(__name__)
 
-# Define a directory to store uploaded videos and audio
-upload_dir = "formedia_uploads"
-if os.path.exists(upload_dir):
-    shutil.rmtree(upload_dir)
-os.makedirs(upload_dir, exist_ok=True)
+# One unique scratch directory per request: tmpfs while the request fits the RAM budget, ./finetune_uploads otherwise.
+# The name must differ from formedia's: each service clears leftovers under its own name at startup
+scratch = ScratchSpace("finetune_uploads", disk_root=".", tmpfs_budget_bytes=4 * 1024 ** 3, max_bytes=50 * 1024 ** 3)
 
 user_api_keys = {
     "user1": "apikey1",
@@ -38,89 +52,46 @@ user_api_keys = {
 semaphore = asyncio.Semaphore(4)  # Limit to 4 concurrent requests
 
 async def process_video(file: UploadFile, news_type: str = None, language: str = None):
+    scratch_dir = None
     try:
-        original_file_name = file.filename
-        file_folder = os.path.join(upload_dir, original_file_name)
-        os.makedirs(file_folder, exist_ok=True)
+        original_file_name = os.path.basename(file.filename)
+        # Audio is decoded straight into memory, so only the upload itself lands in scratch
+        upload_size = getattr(file, "size", None)
+        scratch_dir = scratch.allocate(upload_size)
+        file_folder = scratch_dir.path
         file_path = os.path.join(file_folder, original_file_name)
 
-        # Asynchronously read and write the file
-        async with aiofiles.open(file_path, "wb") as temp_file:
-            file_content = await file.read()
-            await temp_file.write(file_content)
-
-        # Video extensions list
-        video_extensions = [".mp4", ".avi", ".mov", ".wmv", ".mkv", ".flv"]
+        # Stream the upload to scratch in chunks; peak memory stays at one chunk regardless of file size
+        file_size, content_hash = await save_upload_streaming(file, file_path)
 
-        # Check if the file is a video
-        if any(file_path.lower().endswith(ext) for ext in video_extensions):
-            audio_file_path = os.path.join(file_folder, f"{original_file_name}.wav")
-            # Extract audio from video using FFmpeg (faster than moviepy)
-            await extract_audio_from_video(file_path, audio_file_path)
-            if not os.path.exists(audio_file_path) or os.path.getsize(audio_file_path) == 0:
-                raise HTTPException(status_code=500, detail="No audio found in the provided video.")
-        else:
-            audio_file_path = convert_audio_to_16000(file_path, file_path)
+        # Decode the audio track of the audio or video file to 16 kHz samples in memory; 404 if it has none
+        audio = await decode_audio_with_ffmpeg(file_path)
 
         # Log file size and duration
-        file_size = get_file_size(file_path)
         readable_size = format_size(file_size)
         file_duration = get_file_duration(file_path)
         duration_str = f"{file_duration:.2f}s"
-        logger.info(f"Uploaded file: {original_file_name}, Size: {readable_size}, Duration: {duration_str}")
-
-        # Split audio into chunks
-        all_chunks = await split_audio_into_chunks(audio_path=audio_file_path, output_folder=os.path.join(file_folder, "Chunks"))
-
-        segment_info = []
-        full_text_urdu = ''
-        full_text_english = ''
-
-        # Process each audio chunk based on language
-        for chunk in all_chunks:
-            try:
-                start_time = chunk["start"]
-                end_time = chunk["end"]
-                chunk_path = chunk["chunk_path"]
-
-                if language == "ur":
-                    text = transcribe_audio(chunk_path)  # Using Urdu model
-                    if full_text_urdu:
-                        last_word_urdu = full_text_urdu.split()[-1]
-                        first_word_urdu = text.split()[0]
-                        if last_word_urdu == first_word_urdu:
-                            text = " ".join(text.split()[1:])  # Remove the first word from the current chunk
-                    full_text_urdu = (full_text_urdu + " " + text).strip()
-
-                else:
-                    text = transcribe_english_audio(chunk_path)  # Using English model
-                    if full_text_english:
-                        last_word_english = full_text_english.split()[-1]
-                        first_word_english = text.split()[0]
-                        if last_word_english == first_word_english:
-                            text = " ".join(text.split()[1:])  # Remove the first word from the current chunk
-                    full_text_english = (full_text_english + " " + text).strip()
-
-                # Create segment info
-                segment_info.append({
-                    "start": start_time,
-                    "end": end_time,
-                    "text": text
-                })
-
-            except Exception as chunk_error:
-                # Log the error and continue processing the next chunk
-                logger.error(f"Error processing chunk {chunk_path}: {str(chunk_error)}")
-                continue
-
-        # Clean up files
-        shutil.rmtree(file_folder, ignore_errors=True)
-        # Clear PyTorch GPU cache to free up memory (model remains loaded)
-        torch.cuda.empty_cache()
+        logger.info(f"Uploaded file: {original_file_name}, Size: {readable_size}, Duration: {duration_str}, SHA256: {content_hash}")
+
+        # Overlapping 10 s windows over the speech regions, as views over the decoded buffer; silence is skipped
+        windows = iter_speech_windows(audio)
+
+        # Windows are decoded independently: Urdu ones batched through one generate(), English ones in parallel
+        window_results = transcribe_chunks(windows) if language == "ur" else transcribe_english_chunks(windows)
+
+        # Overlapping transcriptions are merged where their word sequences line up
+        stitcher = TranscriptStitcher()
+        while (result := await asyncio.to_thread(next, window_results, None)) is not None:
+            window, text = result
+            if text is not None:
+                stitcher.add(window, text)
+
+        segment_info = [segment for segment in stitcher.segments if segment["text"]]
+        full_text = stitcher.text()
 
         return {
-            "urdu_full_text": full_text_urdu if language == "ur" else None,
-            "english_full_text": full_text_english if language == "en" else None,
+            "urdu_full_text": full_text if language == "ur" else None,
+            "english_full_text": full_text if language == "en" else None,
             "Timestamp": segment_info
         }
 
@@ -130,6 +101,10 @@ async def process_video(file: UploadFile, news_type: str = None, language: str =
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
         return {"error": f"Internal Error {str(e)}"}
+    finally:
+        # Files are removed in the background
+        if scratch_dir is not None:
+            scratch.release(scratch_dir)
 
 
 async def get_api_key(api_key: str = Header(None, convert_underscores=False)):
@@ -179,12 +154,59 @@ async def transcribe_video_endpoint(
         return result
 
 
+def warm_up_models():
+    """Loads both models through the model manager and runs a short decode on each. Blocking."""
+    global ready, load_error
+    try:
+        # One second of faint noise pays the weight load and CUDA initialisation before the first request.
+        # When the memory budget holds only one model, warming the English one evicts the Urdu one again
+        warmup_audio = np.random.default_rng(0).normal(0, 0.01, 16000).astype(np.float32)
+        start_time = time.perf_counter()
+        if transcribe_arrays([warmup_audio])[0] is None:
+            raise RuntimeError(f"Warm-up decode with {urdu_model_id} failed")
+        startup_timings["urdu_warmup_seconds"] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        transcribe_english_audio(warmup_audio)
+        startup_timings["english_warmup_seconds"] = time.perf_counter() - start_time
+        startup_timings["cold_start_seconds"] = time.perf_counter() - process_start_time
+        ready = True
+        logger.info(f"Models {urdu_model_id} and {english_model_id} ready: {startup_timings}")
+    except Exception as e:
+        load_error = str(e)
+        logger.error(f"Warming up models failed: {str(e)}")
+
+
+@app.on_event("startup")
+async def start_model_warmup():
+    global warmup_task
+    # Load and warm up the models in the background so the port binds immediately
+    warmup_task = asyncio.create_task(asyncio.to_thread(warm_up_models))
+
+
+@app.on_event("shutdown")
+async def drain_scratch():
+    await scratch.drain()
+
+
+@app.get("/model_stats")
+async def model_stats():
+    return models.get_stats()
+
+
 @app.get("/live")
 async def live_check():
     logger.info("Live status endpoint accessed")
     return {"live": True}
 
 
+@app.get("/ready")
+async def ready_check():
+    # Unlike /live, only reports ready once both models have been loaded and warmed up
+    if not ready:
+        return JSONResponse(status_code=503, content={"ready": False, "error": load_error})
+    return {"ready": True, "models": [urdu_model_id, english_model_id], **startup_timings}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=2000)
@@ -0,0 +1,70 @@
+import time
+import argparse
+import numpy as np
+from pydub import AudioSegment
+from pydub.silence import split_on_silence
+from chunking import SAMPLING_RATE, decode_audio, find_speech_regions
+
+# Compares the pydub split_on_silence segmentation that get_large_audio_chunks_on_silence used to run
+# with chunking.find_speech_regions on the same audio, e.g.
+#   python benchmark_segmentation.py --minutes 60
+#   python benchmark_segmentation.py --audio programme.wav
+
+
+def synthetic_speech(minutes, seed=0):
+    """Alternates 2-20 s bursts of modulated noise ("speech") with 0.3-2 s pauses of low noise."""
+    rng = np.random.default_rng(seed)
+    total_samples = int(minutes * 60 * SAMPLING_RATE)
+    parts = []
+    length = 0
+    while length < total_samples:
+        speech = rng.normal(0, 0.1, int(rng.uniform(2, 20) * SAMPLING_RATE))
+        # Syllable-rate amplitude modulation
+        speech *= 0.6 + 0.4 * np.sin(np.arange(len(speech)) * 2 * np.pi * 4 / SAMPLING_RATE)
+        pause = rng.normal(0, 0.002, int(rng.uniform(0.3, 2) * SAMPLING_RATE))
+        parts.extend([speech, pause])
+        length += len(speech) + len(pause)
+    return np.concatenate(parts)[:total_samples].astype(np.float32)
+
+
+def pydub_regions(audio, max_chunk_duration=10 * 1000):
+    # The previous implementation: split_on_silence, then hard splits every max_chunk_duration
+    sound = AudioSegment((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes(),
+                         frame_rate=SAMPLING_RATE, sample_width=2, channels=1)
+    chunks = split_on_silence(sound, min_silence_len=1000, silence_thresh=sound.dBFS - 14, keep_silence=500)
+    final_chunks = []
+    for chunk in chunks:
+        for start in range(0, len(chunk), max_chunk_duration):
+            final_chunks.append(chunk[start:start + max_chunk_duration])
+    return final_chunks
+
+
+def summarize(name, seconds, durations, audio_seconds):
+    durations = np.asarray(durations)
+    print(f"{name:>8}: {seconds:8.2f}s ({audio_seconds / seconds:8.0f}x real time) chunks={len(durations)} "
+          f"mean={durations.mean():.2f}s max={durations.max():.2f}s covered={durations.sum() / audio_seconds:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark silence segmentation")
+    parser.add_argument("--audio", help="Audio or video file; synthetic speech is generated when omitted")
+    parser.add_argument("--minutes", type=float, default=10, help="Length of the synthetic audio")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-pydub", action="store_true", help="Only time find_speech_regions")
+    args = parser.parse_args()
+
+    audio = decode_audio(args.audio) if args.audio else synthetic_speech(args.minutes, args.seed)
+    audio_seconds = len(audio) / SAMPLING_RATE
+    print(f"audio: {audio_seconds:.0f}s")
+
+    start_time = time.perf_counter()
+    regions = find_speech_regions(audio)
+    vectorized_seconds = time.perf_counter() - start_time
+    summarize("numpy", vectorized_seconds, [(end - start) / SAMPLING_RATE for start, end in regions], audio_seconds)
+
+    if not args.skip_pydub:
+        start_time = time.perf_counter()
+        chunks = pydub_regions(audio)
+        pydub_seconds = time.perf_counter() - start_time
+        summarize("pydub", pydub_seconds, [len(chunk) / 1000 for chunk in chunks], audio_seconds)
+        print(f"speed-up: {pydub_seconds / vectorized_seconds:.0f}x")
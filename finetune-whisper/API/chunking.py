@@ -1,6 +1,13 @@
 import os
-from pydub import AudioSegment
+import sys
+import asyncio
 import subprocess
+import numpy as np
+# The ffmpeg decoder is shared with the formedia service; appended so this directory's modules take precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "API", "formedia"))
+from ffmpeg_decode import decode_audio_with_ffmpeg
+
+SAMPLING_RATE = 16000
 
 
 async def extract_audio_from_video(video_path, output_audio_path):
@@ -30,94 +37,129 @@ async def extract_audio_from_video(video_path, output_audio_path):
         # Handle errors without printing ffmpeg output
         print(f"Error extracting audio from {video_path}: {e.stderr.decode()}")
 
-async def split_audio_into_chunks(audio_path, output_folder, chunk_duration_ms=10 * 1000, min_chunk_duration_ms=1000):
+def decode_audio(file_path, sampling_rate=SAMPLING_RATE):
     """
-    Split audio file into chunks of specified duration and save them to the output folder.
-    Only chunks longer than the minimum duration are saved, except for the last chunk which is merged
-    with the previous one if it's shorter than the minimum duration.
+    Blocking wrapper around decode_audio_with_ffmpeg for callers outside the event loop.
 
     Parameters:
-        audio_path (str): Path to the audio file to split.
-        output_folder (str): Folder where the audio chunks will be saved.
-        chunk_duration_ms (int): Duration of each audio chunk in milliseconds. Default is 10 seconds.
-        min_chunk_duration_ms (int): Minimum duration of each chunk in milliseconds. Default is 1 second.
+        file_path (str): Path to the audio or video file.
+        sampling_rate (int): Target sampling rate. Default is 16000 Hz.
 
     Returns:
-        list: List of dictionaries with start time, end time, and chunk file path.
+        numpy.ndarray: 1-D float32 samples.
     """
+    return asyncio.run(decode_audio_with_ffmpeg(file_path, sampling_rate))
 
-    # Ensure the output folder exists
-    if not os.path.isdir(output_folder):
-        os.makedirs(output_folder)
+def frame_energy_db(audio, sampling_rate=SAMPLING_RATE, frame_ms=10):
+    """
+    Compute the RMS level of every frame in dBFS with one vectorised pass over the buffer.
 
-    chunk_number = 1  # Initialize chunk numbering
-    chunk_info_list = []  # List to store start time, end time, and chunk paths
+    Parameters:
+        audio (numpy.ndarray): 1-D float samples in [-1, 1].
+        sampling_rate (int): Sampling rate of the samples. Default is 16000 Hz.
+        frame_ms (int): Frame length in milliseconds. Default is 10 ms.
 
-    try:
-        # Load the audio file
-        sound = AudioSegment.from_file(audio_path)
-    except Exception as e:
-        print(f"Error loading {audio_path}: {e}")
-        return chunk_info_list
-
-    # Track the last full chunk to merge the final short chunk
-    previous_chunk = None
-    previous_start = 0
-
-    # Split audio into chunks of specified duration (in milliseconds)
-    for start in range(0, len(sound), chunk_duration_ms):
-        end = min(start + chunk_duration_ms, len(sound))
-        audio_chunk = sound[start:end]
-
-        # If the current chunk is shorter than 1 second and it's the last chunk, merge it with the previous one
-        if len(audio_chunk) < min_chunk_duration_ms and end == len(sound):
-            # Merge the last chunk with the previous one
-            if previous_chunk is not None:
-                merged_chunk = previous_chunk + audio_chunk
-
-                # Update the previous chunk's file with the merged content
-                chunk_filename = os.path.join(output_folder, f"chunk_{chunk_number-1}.wav")
-                try:
-                    merged_chunk.export(chunk_filename, format="wav")
-
-                    # Update the end time of the merged chunk
-                    chunk_info_list[-1]["end"] = end / 1000.0
-
-                except Exception as e:
-                    print(f"Error exporting merged chunk {chunk_number-1}: {e}")
-
-            continue  # Skip saving this chunk since it was merged with the previous one
-
-        # Save each chunk with a unique filename
-        chunk_filename = os.path.join(output_folder, f"chunk_{chunk_number}.wav")
-        try:
-            audio_chunk.export(chunk_filename, format="wav")
-
-            # Convert start and end time from milliseconds to seconds for readability
-            start_time_sec = start / 1000.0
-            end_time_sec = end / 1000.0
-
-            # Append chunk info (start time, end time, chunk file path)
-            chunk_info_list.append({
-                "start": start_time_sec,
-                "end": end_time_sec,
-                "chunk_path": chunk_filename
-            })
-
-            previous_chunk = audio_chunk  # Store the current chunk to potentially merge with the next one
-            previous_start = start_time_sec
-
-            chunk_number += 1
-        except Exception as e:
-            print(f"Error exporting chunk {chunk_number}: {e}")
-
-    print(f"Audio split into chunks and saved to: {output_folder}")
-    return chunk_info_list
-
-# audio_file_path = "/home/waqar/MWaqar/stt-api/finetune-whisper/test/testaudio.wav"
-# output_folder = "audio_chunks"
-# chunks_info = split_audio_into_chunks(audio_file_path, output_folder)
-
-# # Print the details of the audio chunks
-# for chunk in chunks_info:
-#     print(chunk)
\ No newline at end of file
+    Returns:
+        numpy.ndarray: Level of each frame; a trailing partial frame is zero-padded.
+    """
+    frame_samples = sampling_rate * frame_ms // 1000
+    num_frames = -(-len(audio) // frame_samples)
+    frames = np.zeros(num_frames * frame_samples, dtype=np.float32)
+    frames[:len(audio)] = audio
+    frames = frames.reshape(num_frames, frame_samples)
+    # einsum sums the squares row by row without materialising a squared copy
+    mean_square = np.einsum('ij,ij->i', frames, frames) / frame_samples
+    return 10 * np.log10(np.maximum(mean_square, 1e-20))
+
+def find_speech_regions(audio, sampling_rate=SAMPLING_RATE, max_chunk_ms=10 * 1000, min_silence_ms=1000,
+                        silence_thresh_db=-14, keep_silence_ms=500, cut_search_ms=2000, frame_ms=10):
+    """
+    Find speech regions from frame energy, a vectorised replacement for pydub's split_on_silence.
+    Frames quieter than the file's overall level plus silence_thresh_db are silent, and silent runs of at
+    least min_silence_ms separate regions. Regions longer than max_chunk_ms are cut at the quietest frame
+    within cut_search_ms before the cap.
+
+    Parameters:
+        audio (numpy.ndarray): 1-D float samples in [-1, 1].
+        sampling_rate (int): Sampling rate of the samples. Default is 16000 Hz.
+        max_chunk_ms (int): Longest region returned, in milliseconds. Default is 10 seconds.
+        min_silence_ms (int): Shortest silence that separates two regions. Default is 1 second.
+        silence_thresh_db (float): Silence threshold relative to the file's overall dBFS. Default is -14.
+        keep_silence_ms (int): Silence kept on each side of a region. Default is 500 ms.
+        cut_search_ms (int): How far before the cap to look for a quiet cut point. Default is 2 seconds.
+        frame_ms (int): Frame length in milliseconds. Default is 10 ms.
+
+    Returns:
+        list: (start_sample, end_sample) pairs in order.
+    """
+    if len(audio) == 0:
+        return []
+    frame_samples = sampling_rate * frame_ms // 1000
+    energy_db = frame_energy_db(audio, sampling_rate, frame_ms)
+    num_frames = len(energy_db)
+
+    # Overall level of the file, as pydub's AudioSegment.dBFS
+    overall_db = 10 * np.log10(max(float(np.mean(10 ** (energy_db / 10))), 1e-20))
+    silent = energy_db < overall_db + silence_thresh_db
+
+    # Start and end frame of every silent run
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    silence_starts = np.flatnonzero(edges == 1)
+    silence_ends = np.flatnonzero(edges == -1)
+    long_enough = silence_ends - silence_starts >= min_silence_ms // frame_ms
+    silence_starts = silence_starts[long_enough]
+    silence_ends = silence_ends[long_enough]
+
+    # Speech lies between consecutive long silences
+    keep_frames = keep_silence_ms // frame_ms
+    region_starts = np.concatenate(([0], silence_ends))
+    region_ends = np.concatenate((silence_starts, [num_frames]))
+    non_empty = region_ends > region_starts
+    region_starts = np.maximum(region_starts[non_empty] - keep_frames, 0)
+    region_ends = np.minimum(region_ends[non_empty] + keep_frames, num_frames)
+
+    max_frames = max_chunk_ms // frame_ms
+    search_frames = min(cut_search_ms // frame_ms, max_frames - 1)
+    regions = []
+    for start, end in zip(region_starts.tolist(), region_ends.tolist()):
+        while end - start > max_frames:
+            window_start = start + max_frames - search_frames
+            cut = window_start + int(np.argmin(energy_db[window_start:start + max_frames + 1]))
+            regions.append((start, cut))
+            start = cut
+        regions.append((start, end))
+
+    return [(start * frame_samples, min(end * frame_samples, len(audio))) for start, end in regions]
+
+def iter_speech_windows(audio, sampling_rate=SAMPLING_RATE, window_ms=10 * 1000, overlap_ms=2000, **kwargs):
+    """
+    Yield overlapping windows over each speech region of a decoded audio buffer, as numpy views.
+    Consecutive windows within a region share overlap_ms of audio so their transcriptions can be
+    aligned and stitched; windows in different regions are separated by silence and do not overlap.
+
+    Parameters:
+        audio (numpy.ndarray): 1-D samples, e.g. from decode_audio_with_ffmpeg.
+        sampling_rate (int): Sampling rate of the samples. Default is 16000 Hz.
+        window_ms (int): Length of each window in milliseconds. Default is 10 seconds.
+        overlap_ms (int): Audio shared by consecutive windows in milliseconds. Default is 2 seconds.
+        kwargs: Passed to find_speech_regions.
+
+    Yields:
+        dict: Start time, end time (seconds) and the window's samples.
+    """
+    window_samples = window_ms * sampling_rate // 1000
+    overlap_samples = overlap_ms * sampling_rate // 1000
+    # Regions are not capped here; long ones are covered by the overlapping windows instead
+    kwargs.setdefault("max_chunk_ms", len(audio) * 1000 // sampling_rate + window_ms)
+    for region_start, region_end in find_speech_regions(audio, sampling_rate, **kwargs):
+        start = region_start
+        while True:
+            end = min(start + window_samples, region_end)
+            yield {
+                "start": start / sampling_rate,
+                "end": end / sampling_rate,
+                "audio": audio[start:end]
+            }
+            if end == region_end:
+                break
+            start = end - overlap_samples
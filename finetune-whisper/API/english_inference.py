@@ -1,17 +1,77 @@
+import os
+import sys
+import logging
+import itertools
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from faster_whisper import WhisperModel
+from model_manager import models
+# Per-host profiles are tuned and read by the formedia service's module; appended so this directory's
+# modules take precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "API", "formedia"))
+from runtime_profile import load_profile
 
-def transcribe_english_audio(audio_path: str) -> str:
-    # Load the faster-whisper English-specific model (medium.en)
-    model = WhisperModel("medium.en", device="cuda", compute_type="float16")  # Use 'cpu' if no GPU available
-    
-    # Transcribe the audio file
-    segments, info = model.transcribe(audio_path, language="en")  # Specify English language explicitly
-    
-    # Extract the full transcription text from segments
-    full_text = ''.join([segment.text for segment in segments])
+logger = logging.getLogger(__name__)
+
+model_id = "medium.en"
+# Device, precision, threading and beam size tuned for this host by runtime_profile.py
+runtime_profile = load_profile(model_id)
+# CTranslate2 does not report its footprint; medium has ~769M parameters at the profile's precision
+BYTES_PER_PARAMETER = {"float32": 4, "float16": 2, "int8_float16": 1, "int8": 1}
+model_size_bytes = 769_000_000 * BYTES_PER_PARAMETER.get(runtime_profile["compute_type"], 2)
+# Chunks transcribed in parallel by one request, and model workers serving them
+ENGLISH_WORKERS = int(os.environ.get("STT_ENGLISH_WORKERS", runtime_profile["num_workers"]))
+
+
+def load_english_model():
+    """Loads the faster-whisper English-specific model; called by the model manager on first use."""
+    model = WhisperModel(model_id, device=runtime_profile["device"], compute_type=runtime_profile["compute_type"],
+                         cpu_threads=runtime_profile["cpu_threads"], num_workers=ENGLISH_WORKERS)
+    return model, model_size_bytes
+
+
+# WhisperModel can be shared by concurrent transcribe calls; num_workers of them run in parallel
+models.register(model_id, load_english_model, estimated_bytes=model_size_bytes)
+
+
+def transcribe_english_audio(audio: Union[str, np.ndarray]) -> str:
+    """Transcribes an audio file path or an array of 16 kHz float32 samples."""
+    with models.use(model_id) as model:
+        # Transcribe the audio
+        segments, info = model.transcribe(audio, beam_size=runtime_profile["beam_size"],
+                                          language="en")  # Specify English language explicitly
+
+        # Extract the full transcription text from segments
+        full_text = ''.join([segment.text for segment in segments])
 
     return full_text
 
+
+def _transcribe_chunk(chunk):
+    try:
+        return transcribe_english_audio(chunk["audio"])
+    except Exception as e:
+        # A failed chunk is skipped rather than failing the whole request
+        logger.error(f"Error transcribing chunk at {chunk['start']:.2f}s: {str(e)}")
+        return None
+
+
+def transcribe_english_chunks(chunks):
+    """
+    Transcribes chunks from the chunking iterators, ENGLISH_WORKERS at a time in parallel.
+
+    Yields:
+    - (chunk, text) in chunk order; text is None for a chunk that failed.
+    """
+    chunks = iter(chunks)
+    with ThreadPoolExecutor(max_workers=ENGLISH_WORKERS) as pool:
+        while True:
+            batch = list(itertools.islice(chunks, ENGLISH_WORKERS))
+            if not batch:
+                return
+            yield from zip(batch, pool.map(_transcribe_chunk, batch))
+
 # # Example usage
 # audio_file_path ="test.wav"
 # english_text = transcribe_english_audio(audio_file_path)
@@ -1,7 +1,13 @@
+import os
+import logging
+import itertools
 import torch
 import librosa
 from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline, GenerationConfig
-import time  # Import time module for timing
+from types import SimpleNamespace
+from model_manager import models
+
+logger = logging.getLogger(__name__)
 
 # Device configuration
 device = "cuda:0" if torch.cuda.is_available() else "cpu"
@@ -10,77 +16,163 @@ torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
 # Model path or ID
 model_id = "65_hour"
 
-# Load the model
-model = AutoModelForSpeechSeq2Seq.from_pretrained(
-    model_id, 
-    torch_dtype=torch_dtype, 
-    low_cpu_mem_usage=True, 
-    use_safetensors=True,
-    ignore_mismatched_sizes=True
-)
-model.to(device)
-
-# Load the processor
-processor = AutoProcessor.from_pretrained(model_id)
-
-# Ensure suppress_tokens is set correctly
-if model.config.suppress_tokens is None or len(model.config.suppress_tokens) == 0:
-    model.config.suppress_tokens = [
-        processor.tokenizer.pad_token_id, 
-        processor.tokenizer.eos_token_id
-    ]
-
-# Create the pipeline
-pipe = pipeline(
-    "automatic-speech-recognition",
-    model=model,
-    tokenizer=processor.tokenizer,
-    feature_extractor=processor.feature_extractor,
-    torch_dtype=torch_dtype,
-    device=device
-)
+def load_urdu_model():
+    """Loads the fine-tuned Urdu model; called by the model manager on first use."""
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(
+        model_id, 
+        torch_dtype=torch_dtype, 
+        low_cpu_mem_usage=True, 
+        use_safetensors=True,
+        ignore_mismatched_sizes=True
+    )
+    model.to(device)
 
-def transcribe_audio(audio_path):
-    # Start measuring time for loading the audio
-    # start_time = time.time()
-    # 
-    # Load the audio file using librosa without resampling
-    audio, original_sampling_rate = librosa.load(audio_path, sr=None)
-
-    # End timing for loading the audio
-    # end_time = time.time()
-    # print(f"Time taken to load audio: {end_time - start_time:.2f} seconds")
-    
-    # Start measuring time for model inference
-    start_inference_time = time.time()
-
-    # Process the entire audio file
-    audio_features = processor(audio, sampling_rate=original_sampling_rate, return_tensors="pt", padding=True, truncation=True)
-    
-    # Extract input features and create attention mask
+    # Load the processor
+    processor = AutoProcessor.from_pretrained(model_id)
+
+    # Ensure suppress_tokens is set correctly
+    if model.config.suppress_tokens is None or len(model.config.suppress_tokens) == 0:
+        model.config.suppress_tokens = [
+            processor.tokenizer.pad_token_id, 
+            processor.tokenizer.eos_token_id
+        ]
+
+    # Create the pipeline
+    pipe = pipeline(
+        "automatic-speech-recognition",
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        torch_dtype=torch_dtype,
+        device=device
+    )
+
+    size_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+    return SimpleNamespace(pipe=pipe, processor=processor), size_bytes
+
+
+def estimate_urdu_model_bytes():
+    """Size of the checkpoint's weights on disk; an upper bound when they are stored wider than torch_dtype."""
+    try:
+        return sum(os.path.getsize(os.path.join(model_id, name))
+                   for name in os.listdir(model_id) if name.endswith(".safetensors")) or None
+    except OSError:
+        return None
+
+
+# generate() is not safe to run concurrently on one model, so calls are serialised
+models.register(model_id, load_urdu_model, exclusive=True, estimated_bytes=estimate_urdu_model_bytes())
+
+SAMPLING_RATE = 16000
+# Upper bound on chunks per generate() call
+MAX_BATCH_SIZE = int(os.environ.get("STT_MAX_BATCH_SIZE", "16"))
+# Rough GPU memory one 30 s item needs during generate (encoder activations plus decoder cache)
+BATCH_ITEM_BYTES = 256 * 1024 ** 2
+
+
+def choose_batch_size(num_items):
+    """Picks how many chunks to decode together from the GPU memory that is currently free."""
+    if not torch.cuda.is_available():
+        return min(num_items, 4)
+    free_bytes, _ = torch.cuda.mem_get_info()
+    # Keep a quarter of free memory spare for fragmentation and other requests
+    batch_size = int(free_bytes * 0.75 // BATCH_ITEM_BYTES)
+    return max(1, min(num_items, batch_size, MAX_BATCH_SIZE))
+
+
+def _generate(urdu, audios):
+    # Chunks are padded to Whisper's 30 s window; the attention mask marks the real samples
+    audio_features = urdu.processor(audios, sampling_rate=SAMPLING_RATE, return_tensors="pt",
+                                    padding=True, truncation=True, return_attention_mask=True)
     input_features = audio_features["input_features"].to(device, dtype=torch_dtype)
-    attention_mask = audio_features.get("attention_mask", torch.ones(input_features.shape, device=device, dtype=torch_dtype))
-    
+    attention_mask = audio_features["attention_mask"].to(device)
+
     # Set generation configuration
     generation_config = GenerationConfig(max_new_tokens=300)  # Adjust max_new_tokens if necessary
-    
-    # Perform inference
+
     with torch.no_grad():
-        result = pipe.model.generate(
+        return urdu.pipe.model.generate(
             input_features=input_features,
             attention_mask=attention_mask,
             generation_config=generation_config
         )
-    
-    # End timing for inference
-    end_inference_time = time.time()
-    # print(f"Time taken for model inference: {end_inference_time - start_inference_time:.2f} seconds")
-    
-    # Decode and join the transcription
-    transcription = processor.batch_decode(result, skip_special_tokens=True)
-    joined_transcription = ''.join([t.strip() for t in transcription if t.strip()])
-    
-    return joined_transcription
+
+
+def _decode_batch(urdu, batch):
+    result = _generate(urdu, batch)
+    # Decode and join each transcription
+    return [tokens.strip() for tokens in urdu.processor.batch_decode(result, skip_special_tokens=True)]
+
+
+def transcribe_arrays(audios):
+    """
+    Transcribes 16 kHz sample arrays with one padded generate() per batch.
+
+    The batch size follows the GPU memory left free once the model is
+    resident, and is halved and retried if generate() still runs out of
+    memory. A batch that fails for another reason is retried one chunk at a
+    time, so only the chunks that fail on their own are lost.
+
+    Returns:
+    - Transcriptions in the same order as audios; None for a chunk that failed.
+    """
+    transcriptions = []
+    batch_size = None
+    start = 0
+    while start < len(audios):
+        with models.use(model_id) as urdu:
+            if batch_size is None:
+                # Measured after the model is loaded, so its own weights are not counted as free
+                batch_size = choose_batch_size(len(audios))
+            batch = audios[start:start + batch_size]
+            try:
+                transcriptions.extend(_decode_batch(urdu, batch))
+            except torch.cuda.OutOfMemoryError:
+                if batch_size == 1:
+                    raise
+                torch.cuda.empty_cache()
+                batch_size = max(1, batch_size // 2)
+                logger.warning(f"Out of memory during generate; retrying with batch size {batch_size}")
+                continue
+            except Exception as e:
+                logger.warning(f"generate failed for a batch of {len(batch)}: {str(e)}; retrying its chunks one at a time")
+                for index, audio in enumerate(batch, start):
+                    try:
+                        transcriptions.extend(_decode_batch(urdu, [audio]))
+                    except Exception as e:
+                        # A failed chunk is skipped rather than failing the whole request
+                        logger.error(f"Error transcribing chunk {index}: {str(e)}")
+                        transcriptions.append(None)
+        start += len(batch)
+    return transcriptions
+
+
+def transcribe_chunks(chunks):
+    """
+    Transcribes windows from chunking.iter_speech_windows, pulling one batch at a
+    time from the iterator so only that batch's features exist at once.
+
+    Yields:
+    - (chunk, text) in chunk order; text is None for a chunk that failed.
+    """
+    chunks = iter(chunks)
+    # Load the model before sizing batches, so its weights are not counted as free memory
+    with models.use(model_id):
+        batch_size = choose_batch_size(MAX_BATCH_SIZE)
+    while True:
+        batch = list(itertools.islice(chunks, batch_size))
+        if not batch:
+            return
+        yield from zip(batch, transcribe_arrays([chunk["audio"] for chunk in batch]))
+
+
+def transcribe_audio_batch(audio_paths):
+    # Load at 16 kHz, the rate the feature extractor expects
+    return transcribe_arrays([librosa.load(audio_path, sr=SAMPLING_RATE)[0] for audio_path in audio_paths])
+
+
+def transcribe_audio(audio_path):
+    return transcribe_audio_batch([audio_path])[0]
 
 # Example usage
 # audio_path = "path/to/your/audio/file.wav"  # Replace with your audio file path
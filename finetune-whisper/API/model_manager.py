@@ -0,0 +1,147 @@
+import os
+import gc
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class ResidentModel:
+    def __init__(self, model, size_bytes, exclusive):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.users = 0
+        # Serialises calls into models that are not safe to run concurrently
+        self.call_lock = threading.Lock() if exclusive else None
+
+
+class ModelResidencyManager:
+    """
+    Loads models on first use and keeps them resident under a memory budget.
+
+    When a model has to be loaded and the budget is full, the least recently
+    used models that nobody is currently using are evicted first. Loads happen
+    outside the lock, and concurrent requests for a model that is still loading
+    wait for that one load instead of starting their own.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.loaders = {}
+        self.resident = OrderedDict()
+        self.loading = set()
+        # Footprint measured at each model's last load (or estimated at registration), used to make room before loading it
+        self.known_sizes = {}
+        self.condition = threading.Condition()
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0, "load_seconds": 0.0}
+
+    def register(self, name, loader, exclusive=False, estimated_bytes=None):
+        """
+        Parameters:
+        - loader: Callable returning (model, size_bytes).
+        - exclusive: Run one call at a time through this model.
+        - estimated_bytes: Expected footprint, used to make room before the first load.
+        """
+        self.loaders[name] = (loader, exclusive)
+        if estimated_bytes is not None:
+            self.known_sizes.setdefault(name, estimated_bytes)
+
+    def _resident_bytes(self):
+        return sum(entry.size_bytes for entry in self.resident.values())
+
+    def _evict_idle(self):
+        # Called with the lock held; drops the least recently used model nobody is using
+        for name, entry in self.resident.items():
+            if entry.users == 0:
+                del self.resident[name]
+                self.stats["evictions"] += 1
+                logger.info(f"Evicted model {name} ({entry.size_bytes / 1024 ** 3:.2f} GB)")
+                return True
+        return False
+
+    def _release_memory(self):
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def acquire(self, name):
+        with self.condition:
+            while True:
+                entry = self.resident.get(name)
+                if entry is not None:
+                    self.resident.move_to_end(name)
+                    entry.users += 1
+                    self.stats["hits"] += 1
+                    return entry
+                if name not in self.loading:
+                    self.loading.add(name)
+                    break
+                self.condition.wait()
+
+            # Make room up front when the footprint is known from an earlier load or an estimate
+            needed_bytes = self.known_sizes.get(name, 0)
+            evicted = False
+            while self.resident and self._resident_bytes() + needed_bytes > self.budget_bytes:
+                if not self._evict_idle():
+                    break
+                evicted = True
+
+        if evicted:
+            self._release_memory()
+        loader, exclusive = self.loaders[name]
+        start_time = time.perf_counter()
+        try:
+            model, size_bytes = loader()
+        except BaseException:
+            with self.condition:
+                self.loading.discard(name)
+                self.condition.notify_all()
+            raise
+        load_seconds = time.perf_counter() - start_time
+
+        with self.condition:
+            entry = ResidentModel(model, size_bytes, exclusive)
+            entry.users = 1
+            self.resident[name] = entry
+            self.known_sizes[name] = size_bytes
+            self.loading.discard(name)
+            self.stats["loads"] += 1
+            self.stats["load_seconds"] += load_seconds
+            evicted = False
+            while self._resident_bytes() > self.budget_bytes and self._evict_idle():
+                evicted = True
+            self.condition.notify_all()
+        if evicted:
+            self._release_memory()
+        logger.info(f"Loaded model {name} ({size_bytes / 1024 ** 3:.2f} GB) in {load_seconds:.2f}s")
+        return entry
+
+    def release(self, entry):
+        with self.condition:
+            entry.users -= 1
+
+    @contextmanager
+    def use(self, name):
+        """Yields the named model, loading it if needed, and keeps it resident while in use."""
+        entry = self.acquire(name)
+        try:
+            if entry.call_lock is None:
+                yield entry.model
+            else:
+                with entry.call_lock:
+                    yield entry.model
+        finally:
+            self.release(entry)
+
+    def get_stats(self):
+        with self.condition:
+            return {**self.stats, "resident": list(self.resident),
+                    "resident_bytes": self._resident_bytes(), "budget_bytes": self.budget_bytes}
+
+
+# Shared by the English and Urdu inference modules
+models = ModelResidencyManager(int(float(os.environ.get("STT_MODEL_MEMORY_BUDGET_GB", "10")) * 1024 ** 3))
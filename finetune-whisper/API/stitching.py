@@ -0,0 +1,130 @@
+import math
+
+
+def common_runs(a, b, min_run=1):
+    """
+    Find every maximal run of consecutive tokens shared by two sequences.
+
+    Parameters:
+        a (list): First token sequence.
+        b (list): Second token sequence.
+        min_run (int): Shortest run returned.
+
+    Returns:
+        list: (start in a, start in b, length) for each run.
+    """
+    runs = []
+    # lengths[j] is the length of the common run ending at a[i - 1] and b[j - 1]
+    lengths = [0] * (len(b) + 1)
+    for i in range(1, len(a) + 1):
+        previous = lengths
+        lengths = [0] * (len(b) + 1)
+        for j in range(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                lengths[j] = previous[j - 1] + 1
+        for j in range(1, len(b) + 1):
+            # A run is maximal when it cannot be extended by the next pair of tokens
+            extends = i < len(a) and j < len(b) and a[i] == b[j]
+            if lengths[j] >= min_run and not extends:
+                runs.append((i - lengths[j], j - lengths[j], lengths[j]))
+    return runs
+
+
+class TranscriptStitcher:
+    """
+    Merges the transcriptions of overlapping windows, added in order.
+
+    When a window overlaps the previous one, only the words that can have been
+    spoken in the overlap are aligned: the tail of the previous window and the
+    head of the new one, sized by the overlap's share of each window plus a
+    margin. The longest common run of at least min_run words there (among
+    equally long runs, the one closest to the middle of the overlap) is the
+    join point, and the windows are joined in the middle of it, so a word cut
+    by one window's edge is taken from the window that heard it whole. A single
+    word repeated exactly across the edge is dropped once; with no anchored
+    match at all, the windows are concatenated.
+    """
+
+    def __init__(self, min_run=2, margin_ratio=1.5, margin_words=2):
+        self.min_run = min_run
+        self.margin_ratio = margin_ratio
+        self.margin_words = margin_words
+        self.words = []
+        self.segments = []
+        # Where the last segment's words start in self.words
+        self.last_offset = 0
+        # The previous window as added, and how many of its leading words were dropped when it was joined
+        self.last_window = None
+        self.last_window_words = []
+        self.last_dropped = 0
+
+    def _span(self, num_words, overlap, duration):
+        # Words that can fall inside the overlap, with a margin for uneven speaking rate
+        share = overlap / duration if duration > 0 else 1.0
+        return min(num_words, math.ceil(num_words * share * self.margin_ratio) + self.margin_words)
+
+    def _join_point(self, previous_words, words, window):
+        """Returns (index into previous_words to keep up to, number of new words to drop)."""
+        previous_start, previous_end = self.last_window["start"], self.last_window["end"]
+        start, end = window["start"], window["end"]
+        overlap = previous_end - start
+        midpoint = (start + previous_end) / 2
+
+        tail_start = max(len(previous_words) - self._span(len(previous_words), overlap, previous_end - previous_start),
+                         self.last_dropped)
+        head_end = self._span(len(words), overlap, end - start)
+        tail = previous_words[tail_start:]
+        head = words[:head_end]
+
+        def distance(run):
+            i, j, length = run
+            # Where each copy of the run sits in time, assuming words are spread evenly over their window
+            previous_time = previous_start + (tail_start + i + length / 2) / len(previous_words) * (previous_end - previous_start)
+            time = start + (j + length / 2) / len(words) * (end - start)
+            return abs(previous_time - midpoint) + abs(time - midpoint)
+
+        runs = common_runs(tail, head, self.min_run)
+        if runs:
+            # The longest run wins; a phrase repeated in the overlap is settled by the copy nearest the middle
+            i, j, length = min(runs, key=lambda run: (-run[2], distance(run)))
+            return tail_start + i + length // 2, j + length // 2
+        if tail and head and tail[-1] == head[0]:
+            return len(previous_words), 1
+        return len(previous_words), 0
+
+    def add(self, chunk, text):
+        """
+        Parameters:
+            chunk (dict): Window with "start" and "end" in seconds.
+            text (str): Transcription of the window.
+        """
+        words = text.split()
+        window_words = words
+        start_time, end_time = chunk["start"], chunk["end"]
+        previous = self.segments[-1] if self.segments else None
+        dropped = 0
+
+        if previous is not None and start_time < self.last_window["end"]:
+            keep, dropped = self._join_point(self.last_window_words, words, chunk)
+            # The boundary sits in the middle of the overlap
+            boundary_time = (start_time + self.last_window["end"]) / 2
+            previous["end"] = boundary_time
+            retained = self.last_window_words[self.last_dropped:keep]
+            previous["text"] = " ".join(retained)
+            self.words = self.words[:self.last_offset + len(retained)]
+            words = words[dropped:]
+            start_time = boundary_time
+
+        self.last_window = chunk
+        self.last_window_words = window_words
+        self.last_dropped = dropped
+        self.last_offset = len(self.words)
+        self.words.extend(words)
+        self.segments.append({
+            "start": start_time,
+            "end": end_time,
+            "text": " ".join(words)
+        })
+
+    def text(self):
+        return " ".join(self.words)
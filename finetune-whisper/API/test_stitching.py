@@ -0,0 +1,64 @@
+from stitching import TranscriptStitcher, common_runs
+
+
+def stitch(*windows):
+    stitcher = TranscriptStitcher()
+    for start, end, text in windows:
+        stitcher.add({"start": start, "end": end}, text)
+    return stitcher
+
+
+def test_common_runs_finds_every_maximal_run():
+    a = "it is what it is".split()
+    b = "what it is about".split()
+    assert sorted(common_runs(a, b, min_run=2)) == [(0, 1, 2), (2, 0, 3)]
+
+
+def test_cut_word_is_taken_from_the_window_that_heard_it_whole():
+    stitcher = stitch((0, 10, "the quick brown fox jum"),
+                      (8, 18, "brown fox jumps over the lazy"),
+                      (16, 26, "the lazy dog"))
+    assert stitcher.text() == "the quick brown fox jumps over the lazy dog"
+
+
+def test_common_bigram_outside_the_overlap_is_ignored():
+    stitcher = stitch((0, 10, "in the morning the minister said the new policy would take effect by tomorrow"),
+                      (8, 18, "tomorrow night officials in the capital disagreed with this decision"))
+    assert stitcher.text() == ("in the morning the minister said the new policy would take effect by tomorrow "
+                               "night officials in the capital disagreed with this decision")
+
+
+def test_repeated_phrase_early_in_the_window_is_not_the_join_point():
+    stitcher = stitch((0, 10, "he said it is what it is and then left the hall quickly"),
+                      (8, 18, "hall quickly while reporters asked what it is about"))
+    assert stitcher.text() == ("he said it is what it is and then left the hall quickly "
+                               "while reporters asked what it is about")
+
+
+def test_phrase_repeated_inside_the_overlap_joins_at_the_copy_nearest_the_middle():
+    stitcher = stitch((0, 10, "one two three four five six seven eight go on go on"),
+                      (8, 18, "go on go on nine ten eleven twelve thirteen fourteen"))
+    assert stitcher.text() == ("one two three four five six seven eight go on go on "
+                               "nine ten eleven twelve thirteen fourteen")
+
+
+def test_no_anchored_match_concatenates():
+    stitcher = stitch((0, 10, "alpha beta gamma delta"), (8, 18, "epsilon zeta eta theta"))
+    assert stitcher.text() == "alpha beta gamma delta epsilon zeta eta theta"
+
+
+def test_windows_that_do_not_overlap_are_not_aligned():
+    stitcher = stitch((0, 5, "what it is"), (7, 12, "what it is"))
+    assert stitcher.text() == "what it is what it is"
+    assert [segment["start"] for segment in stitcher.segments] == [0, 7]
+
+
+def test_segments_meet_in_the_middle_of_the_overlap():
+    stitcher = stitch((0, 10, "a b c d e f"), (8, 18, "e f g h"))
+    assert [(s["start"], s["end"], s["text"]) for s in stitcher.segments] == [(0, 9.0, "a b c d e"),
+                                                                              (9.0, 18, "f g h")]
+
+
+def test_equally_long_runs_prefer_the_one_nearest_the_middle_of_the_overlap():
+    stitcher = stitch((0, 10, "a b c d e f g h i j x y k x y"), (8, 18, "x y l x y m n o p q"))
+    assert stitcher.text() == "a b c d e f g h i j x y k x y l x y m n o p q"
@@ -1,7 +1,9 @@
 from pydub import AudioSegment
 import os
 import yt_dlp
-from pydub.silence import split_on_silence
+import wave
+import numpy as np
+from chunking import SAMPLING_RATE, decode_audio, find_speech_regions
 import re
 import subprocess
 def get_file_duration(file_path):
@@ -34,6 +36,7 @@ def format_size(size_in_bytes):
         if size_in_bytes < 1024:
             return f"{size_in_bytes:.2f} {unit}"
         size_in_bytes /= 1024
+
 def generate_unique_filename(extension):
     base_filename = "audio_download"
     count = 1
@@ -81,37 +84,27 @@ def get_large_audio_chunks_on_silence(path, output_folder="chunks", max_chunk_du
     chunk_number = 1  # Initialize chunk numbering
 
     try:
-        # Open the audio file using pydub
-        sound = AudioSegment.from_file(path)
+        # Decode the audio file to 16 kHz samples
+        audio = decode_audio(path)
     except Exception as e:
         print(f"Error loading {path}: {e}")
-       
-
-    # Split audio sound where silence is 1000 milliseconds or more and get chunks
-    chunks = split_on_silence(
-        sound,
-        min_silence_len=1000,  # Minimum silence length in milliseconds
-        silence_thresh=sound.dBFS - 14,  # Silence threshold
-        keep_silence=500,  # Keep silence of 500 milliseconds
-    )
+        return all_chunks_paths
 
-    # Ensure each chunk is no longer than max_chunk_duration
-    final_chunks = []
-    for chunk in chunks:
-        if len(chunk) > max_chunk_duration:
-            # Split large chunks into smaller chunks of max_chunk_duration
-            for start in range(0, len(chunk), max_chunk_duration):
-                end = start + max_chunk_duration
-                final_chunks.append(chunk[start:end])
-        else:
-            final_chunks.append(chunk)
+    # Split where silence is 1000 milliseconds or more, keeping 500 milliseconds either side;
+    # chunks longer than max_chunk_duration are cut at their quietest point near the limit
+    regions = find_speech_regions(audio, max_chunk_ms=max_chunk_duration, min_silence_ms=1000,
+                                  silence_thresh_db=-14, keep_silence_ms=500)
 
     # Process each chunk and save with unique filenames
-    for audio_chunk in final_chunks:
-        # Generate a unique filename with prefix GW_chunk_
+    for start, end in regions:
         chunk_filename = os.path.join(output_folder, f"chunks_{chunk_number}.wav")
         try:
-            audio_chunk.export(chunk_filename, format="wav")
+            pcm = (np.clip(audio[start:end], -1.0, 1.0) * 32767).astype(np.int16)
+            with wave.open(chunk_filename, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(SAMPLING_RATE)
+                wav_file.writeframes(pcm.tobytes())
             all_chunks_paths.append(chunk_filename)
             chunk_number += 1  # Increment chunk number for the next chunk
         except Exception as e:
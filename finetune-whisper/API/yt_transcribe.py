@@ -1,8 +1,9 @@
 from fastapi import FastAPI, Form
-from utils import download_youtube_audio, get_large_audio_chunks_on_silence
-from inference import transcribe_audio
+from utils import download_youtube_audio
+from chunking import decode_audio_with_ffmpeg, iter_speech_windows
+from inference import transcribe_chunks
+from stitching import TranscriptStitcher
 import os
-import shutil
 import asyncio
 
 # Define the FastAPI app
@@ -16,20 +17,20 @@ async def process_url(url: str = Form(...)):
     async with processing_lock:  # Ensure only one request is processed at a time
         # Download audio from YouTube
         audio_path = download_youtube_audio(url)
-        # Get chunks of audio based on silence detection
-        all_chunks_path = get_large_audio_chunks_on_silence(audio_path)
+        # Decode once and split on silence in memory
+        audio = await decode_audio_with_ffmpeg(audio_path)
         # Remove the original audio file after processing
         os.remove(audio_path)
         
-        text = []
-        for audio in all_chunks_path:
-            text.append(transcribe_audio(audio))
-        
-        # Clean up chunks directory
-        shutil.rmtree("chunks")
+        # Overlapping windows are decoded independently and stitched where they line up
+        stitcher = TranscriptStitcher()
+        for window, text in transcribe_chunks(iter_speech_windows(audio)):
+            # Windows that failed to decode are skipped
+            if text is not None:
+                stitcher.add(window, text)
         
         # Join all transcriptions into a single string
-        return " ".join(text)
+        return stitcher.text()
 
 # Run the app with `uvicorn filename:app --reload`
 if __name__ == "__main__":